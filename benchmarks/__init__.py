@@ -0,0 +1,3 @@
+"""Timing scripts for the data pipeline. Each module is ran directly, for
+    example `python -m lac_covid19.benchmarks.fetch`.
+"""
@@ -0,0 +1,71 @@
+"""Compares the BeautifulSoup and lxml text extraction of every cached press
+    release, both for speed and for whether the parsed results agree.
+"""
+
+import os.path
+import re
+import time
+
+import lac_covid19.daily_pr.access as access
+import lac_covid19.daily_pr.archive as archive
+from lac_covid19.daily_pr.bad_data import SUBSTITUE_SORUCE
+from lac_covid19.daily_pr.parse import parse_pr
+from lac_covid19.daily_pr.prid import PRID
+
+EXTRACTORS = {
+    'bs4': access.extract_text_bs4,
+    'lxml': access.extract_text_lxml,
+}
+NO_CORPUS = ('No cached releases in cached-html or the release archive, run '
+             'access.fetch_all_html() first')
+
+
+def cached_corpus():
+    """The raw html of every cached press release, keyed by date."""
+    corpus = {}
+    for date in PRID:
+        if os.path.isfile(path := os.path.join(access.DIR_HTML,
+                                               f'{date}.html')):
+            with open(path) as f:
+                corpus[date] = f.read()
+        elif (raw_html := archive.read(date)) is not None:
+            corpus[date] = raw_html
+        else:
+            continue
+        for pattern, replacement in SUBSTITUE_SORUCE.get(date, ()):
+            corpus[date] = re.sub(pattern, replacement, corpus[date])
+    return corpus
+
+
+def time_extractor(extract_text, corpus):
+    """Extracts every release, returning the texts and seconds elapsed."""
+    start = time.perf_counter()
+    texts = {x: extract_text(corpus[x]) for x in corpus}
+    return texts, time.perf_counter() - start
+
+
+def time_parse(texts):
+    start = time.perf_counter()
+    parsed = {x: parse_pr(texts[x]) for x in texts}
+    return parsed, time.perf_counter() - start
+
+
+def main():
+    if not (corpus := cached_corpus()):
+        raise SystemExit(NO_CORPUS)
+    print(f'{len(corpus)} cached releases')
+    results = {}
+    for name, extract_text in EXTRACTORS.items():
+        texts, extract_seconds = time_extractor(extract_text, corpus)
+        parsed, parse_seconds = time_parse(texts)
+        results[name] = parsed
+        chars = sum(map(len, texts.values())) / len(texts)
+        print(f'{name:>4}: extract {extract_seconds:.2f}s '
+              f'({len(corpus) / extract_seconds:.0f} releases/s), '
+              f'parse {parse_seconds:.2f}s, {chars:,.0f} chars/release')
+    mismatched = [x for x in corpus if results['bs4'][x] != results['lxml'][x]]
+    print(f'{len(mismatched)} releases parse differently: {mismatched}')
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Compares serial and concurrent press release downloads against a local
+    stand-in for the LACDPH web server.
+"""
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import os.path
+import tempfile
+import threading
+import time
+
+import lac_covid19.daily_pr.access as access
+import lac_covid19.daily_pr.archive as archive
+from lac_covid19.daily_pr.prid import PRID
+
+STAND_IN_PAGE = '<html><body><p>For Immediate Release: {}</p></body></html>'
+
+
+def stand_in_server(latency=0.1):
+    """Starts a local server which answers every request after a delay to
+        imitate a round trip to the county website.
+    Returns:
+        The server and a press release url template pointing at it.
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+
+        def do_GET(self):  # pylint: disable=invalid-name
+            time.sleep(latency)
+            body = STAND_IN_PAGE.format(self.path).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):  # pylint: disable=arguments-differ
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_port}/?prid={{}}'
+
+
+def time_fetch(dates, url, workers, rate_limit=None):
+    """Downloads the dates into an empty directory without an archive, so the
+        cached pages and the archive are left untouched, and returns the
+        seconds elapsed.
+    """
+    paths = {(module, name): getattr(module, name)
+             for module in (access, archive)
+             for name in ('DIR_HTML', 'HTML_INDEX')}
+    paths[(archive, 'HTML_ARCHIVE')] = archive.HTML_ARCHIVE
+    with tempfile.TemporaryDirectory() as tmp:
+        for module, name in paths:
+            setattr(module, name, (tmp if name == 'DIR_HTML' else
+                                   os.path.join(tmp, name.lower())))
+        archive._loaded.clear()  # pylint: disable=protected-access
+        try:
+            start = time.perf_counter()
+            if workers is None:
+                for x in dates:
+                    access._fetch_html(x, url)  # pylint: disable=protected-access
+            else:
+                access.fetch_all_html(dates, workers, rate_limit, url)
+            return time.perf_counter() - start
+        finally:
+            for (module, name), path in paths.items():
+                setattr(module, name, path)
+            archive._loaded.clear()  # pylint: disable=protected-access
+
+
+def main(latency=0.1, n_dates=60, worker_counts=(2, 4, 8, 16)):
+    server, url = stand_in_server(latency)
+    dates = list(PRID)[:n_dates]
+    try:
+        serial = time_fetch(dates, url, None)
+        print(f'serial: {serial:.2f}s ({len(dates) / serial:.1f} pages/s)')
+        for workers in worker_counts:
+            elapsed = time_fetch(dates, url, workers)
+            print(f'{workers:>2} workers: {elapsed:.2f}s '
+                  f'({len(dates) / elapsed:.1f} pages/s, '
+                  f'{serial / elapsed:.1f}x)')
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""Times the daily change and 14-day average of cases over the area and region
+    tables by the AreaMatrix the builders use and group by group by
+    covid_tools, and reports how far the two differ.
+
+    python -m lac_covid19.benchmarks.kernels [--repeat 5]
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+import lac_covid19.const as const
+import lac_covid19.daily_pr.time_series as time_series
+from lac_covid19.daily_pr.area_matrix import SUM, AreaMatrix
+
+DATE = const.DATE
+CASES = const.CASES
+COLUMNS = (const.NEW_CASES, const.NEW_CASES_14_DAY_AVG)
+
+
+def _area_matrix(df, group):
+    matrix = AreaMatrix.from_long(df, (CASES,), group, SUM)
+    return time_series._group_stats(
+        matrix, CASES, np.full(len(matrix.areas), np.nan),
+        time_series.REGION_COLUMNS, group)
+
+
+def _covid_tools(df, group):
+    import covid_tools.calc
+    return covid_tools.calc.compute_all_groups(
+        df.groupby([DATE, group])[CASES].sum().reset_index(), DATE, CASES,
+        group, *COLUMNS)
+
+
+PATHS = {
+    'area matrix': _area_matrix,
+    'covid_tools': _covid_tools,
+}
+
+
+def _max_difference(a, b):
+    """The largest absolute difference, counting a value missing from only
+        one side as infinite.
+    """
+    if not len(a):
+        return 0.
+    if (np.isnan(a) != np.isnan(b)).any():
+        return float('inf')
+    return float(np.nanmax(np.abs(a - b), initial=0.))
+
+
+def _differences(df, expected, group):
+    """The rows of only one table, and the largest difference of each column
+        over the rows of both.
+    """
+    merged = df[[DATE, group, *COLUMNS]].merge(
+        expected[[DATE, group, *COLUMNS]], 'outer', [DATE, group],
+        suffixes=('', ' expected'), indicator=True)
+    both = merged['_merge'] == 'both'
+    report = {'unmatched_rows': int((~both).sum())}
+    for column in COLUMNS:
+        report[column] = _max_difference(
+            merged.loc[both, column].to_numpy(dtype=float, na_value=np.nan),
+            merged.loc[both, f'{column} expected'].to_numpy(
+                dtype=float, na_value=np.nan))
+    return report
+
+
+def run(tables, repeat=5):
+    """Times every path over each table, keeping the fastest of each repeat.
+    Returns:
+        A dictionary of table to path to seconds and, for every path but the
+        area matrix, its differences from the area matrix. Paths whose
+        packages are not installed are left out.
+    """
+    report = {}
+    for name, (df, group) in tables.items():
+        report[name] = {}
+        for path, func in PATHS.items():
+            try:
+                best = float('inf')
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    result = func(df, group)
+                    best = min(best, time.perf_counter() - start)
+            except ImportError:
+                continue
+            if path == 'area matrix':
+                expected = result
+            report[name][path] = {'seconds': best,
+                                  **_differences(result, expected, group)}
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    all_ts = time_series.generate_all_ts()
+    tables = {
+        const.AREA: (all_ts[const.AREA], const.AREA),
+        const.REGION: (all_ts[const.REGION], const.REGION),
+    }
+    report = run(tables, args.repeat)
+    for name, paths in report.items():
+        print(f'{name}: {len(tables[name][0]):,} rows')
+        for path, stats in paths.items():
+            print(f"{path:>16}: {stats['seconds'] * 1e3:8.2f} ms, "
+                  f"{stats['unmatched_rows']:,} unmatched rows, differs by "
+                  f"{stats[const.NEW_CASES]:.2g} in changes and "
+                  f"{stats[const.NEW_CASES_14_DAY_AVG]:.2g} in averages")
+
+
+if __name__ == "__main__":
+    main()
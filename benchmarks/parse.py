@@ -0,0 +1,117 @@
+"""Times parse_pr and each of its section parsers over every cached press
+    release. Results can be saved as a baseline, and later runs are compared
+    against it to flag sections which became slower or whose output changed.
+
+    python -m lac_covid19.benchmarks.parse [--save] [--tolerance 0.2]
+"""
+
+import argparse
+import hashlib
+import json
+import os.path
+import time
+
+import lac_covid19.daily_pr.parse as parse
+from lac_covid19.benchmarks.extract import NO_CORPUS, cached_corpus
+from lac_covid19.daily_pr.access import extract_text_lxml
+from lac_covid19.const import JSON_INDENT
+
+BASELINE = os.path.join(os.path.dirname(__file__), 'parse-baseline.json')
+
+# Each section parser, called with the text, the anchors and the date.
+SECTIONS = {
+    'anchors': lambda txt, anchors, date: parse.locate_sections(txt),
+    'date': lambda txt, anchors, date: parse._parse_date(txt, anchors),
+    'new cases/deaths': lambda txt, anchors, date: (
+        parse._get_new_cases_deaths(txt, date, anchors)),
+    'health dept': lambda txt, anchors, date: (
+        parse._parse_hd_cases_deaths(txt, anchors)),
+    'hospitalizations': lambda txt, anchors, date: (
+        parse._parse_hospitalizations(txt, anchors)),
+    'age': lambda txt, anchors, date: parse._parse_age_cases(txt, anchors),
+    'gender': lambda txt, anchors, date: parse._parse_gender(txt, anchors),
+    'race cases': lambda txt, anchors, date: (
+        parse._parse_race_cases(txt, anchors)),
+    'race deaths': lambda txt, anchors, date: (
+        parse._parse_race_deaths(txt, anchors)),
+    'area': lambda txt, anchors, date: parse._parse_csa(txt, date, anchors),
+    'parse_pr': lambda txt, anchors, date: parse.parse_pr(txt),
+}
+
+
+def _digest(results):
+    """A fingerprint of parsed output, to detect changes in what is parsed."""
+    return hashlib.sha256(
+        json.dumps(results, default=str, sort_keys=True).encode()
+    ).hexdigest()
+
+
+def run(texts, repeat=5):
+    """Times every section over all texts, keeping the fastest of each repeat.
+    Returns:
+        A dictionary of section to seconds per release, releases per second
+        and a digest of the section's output.
+    """
+    anchors = {x: parse.locate_sections(texts[x]) for x in texts}
+    dates = {x: parse._parse_date(texts[x], anchors[x]) for x in texts}
+    report = {}
+    for section, parser in SECTIONS.items():
+        best = float('inf')
+        for _ in range(repeat):
+            start = time.perf_counter()
+            results = [parser(texts[x], anchors[x], dates[x]) for x in texts]
+            best = min(best, time.perf_counter() - start)
+        report[section] = {
+            'seconds_per_release': best / len(texts),
+            'releases_per_second': len(texts) / best,
+            'digest': _digest(results),
+        }
+    return report
+
+
+def compare(report, baseline, tolerance=0.2):
+    """Lists sections slower than the baseline by more than the tolerance, or
+        whose output no longer matches.
+    """
+    regressions = []
+    for section, stats in report.items():
+        if (before := baseline.get(section)) is None:
+            continue
+        ratio = stats['seconds_per_release'] / before['seconds_per_release']
+        if ratio > 1 + tolerance:
+            regressions.append(f'{section}: {ratio:.2f}x slower')
+        if stats['digest'] != before['digest']:
+            regressions.append(f'{section}: output changed')
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--save', action='store_true',
+                        help='save the results as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='allowed slowdown before flagging, 0.2 = 20%%')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    if not (corpus := cached_corpus()):
+        raise SystemExit(NO_CORPUS)
+    texts = {x: extract_text_lxml(corpus[x]) for x in corpus}
+    report = run(texts, args.repeat)
+    print(f'{len(texts)} cached releases')
+    for section, stats in report.items():
+        print(f"{section:>16}: {stats['seconds_per_release'] * 1e6:8.1f} "
+              f"us/release {stats['releases_per_second']:10,.0f} releases/s")
+
+    if os.path.isfile(BASELINE):
+        with open(BASELINE) as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        print('\n'.join(regressions) if regressions
+              else 'No regressions against the baseline')
+    if args.save:
+        with open(BASELINE, 'w') as f:
+            json.dump(report, f, indent=JSON_INDENT)
+
+
+if __name__ == "__main__":
+    main()
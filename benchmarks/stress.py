@@ -0,0 +1,115 @@
+"""Feeds the parser truncated, duplicated and garbled press releases, and
+    flags any release which takes longer than a time bound proportional to
+    its length, so a malformed release cannot stall parsing.
+
+    python -m lac_covid19.benchmarks.stress [--seconds-per-mb 2] [--seed 0]
+"""
+
+import argparse
+import random
+import re
+import time
+
+import lac_covid19.daily_pr.parse as parse
+from lac_covid19.benchmarks.extract import NO_CORPUS, cached_corpus
+from lac_covid19.daily_pr.access import extract_text_lxml
+
+SECONDS_PER_MB = 2.0
+BASE_SECONDS = 0.01  # Allowance for the fixed cost of a single parse
+RELEASES = 20  # Releases sampled from the cache
+
+# The names of the sections whose regular expressions search ahead, repeated
+# without the numbers they search for.
+_SECTION_NAMES = ('Los Angeles County Long Beach Pasadena City of Agoura Hills '
+                  'Unincorporated - Acton Age Group (Los Angeles Male 5 to 11 '
+                  'Hospitalized (Ever) new deaths and ')
+# Sections with their numbers repeated along a single line, which each
+# search ahead to the end of the line from every repetition.
+_REPEATED_SECTIONS = ('Los Angeles County 1 Long Beach ',
+                      'Age Group (Los Angeles 5 to 11 Male ', 'City of 1 ')
+_GARBLE = '0123456789,-*() \nabcLBP'
+
+
+def _garble(pr_txt, rng, rate=0.05):
+    chars = list(pr_txt)
+    for i in rng.sample(range(len(chars)), int(rate * len(chars))):
+        chars[i] = rng.choice(_GARBLE)
+    return ''.join(chars)
+
+
+# Each malformation, called with the text of a release and a random generator
+MALFORMATIONS = {
+    'truncated': lambda txt, rng: txt[:rng.randrange(len(txt))],
+    'duplicated': lambda txt, rng: txt * 20,
+    'single line': lambda txt, rng: txt.replace('\n', ' ') * 5,
+    'garbled': _garble,
+    'unterminated': lambda txt, rng: re.sub(
+        'Under\s+Investigation|\d', '', txt).replace('\n', ' ') * 5,
+    'section names': lambda txt, rng: (
+        txt + _SECTION_NAMES * (len(txt) // len(_SECTION_NAMES))),
+    'repeated sections': lambda txt, rng: txt + '\n'.join(
+        x * (len(txt) // len(x)) for x in _REPEATED_SECTIONS),
+}
+
+
+def time_parse(pr_txt):
+    """Parses a release, returning the seconds taken and any error raised.
+        Malformed releases are expected to fail, only the time matters.
+    """
+    start = time.perf_counter()
+    error = None
+    try:
+        parse.parse_pr(pr_txt)
+    except Exception as e:  # pylint: disable=broad-except
+        error = type(e).__name__
+    return time.perf_counter() - start, error
+
+
+def run(texts, seed=0, seconds_per_mb=SECONDS_PER_MB):
+    """Parses every malformation of every text.
+    Returns:
+        A dictionary of malformation to the slowest parse in seconds per
+        megabyte, and a list of the parses exceeding the time bound.
+    """
+    rng = random.Random(seed)
+    slowest, violations = {}, []
+    for name, malform in MALFORMATIONS.items():
+        slowest[name] = 0
+        for date, pr_txt in texts.items():
+            malformed = malform(pr_txt, rng)
+            seconds, error = time_parse(malformed)
+            megabytes = max(len(malformed), 1) / 1e6
+            slowest[name] = max(slowest[name], seconds / megabytes)
+            if seconds > BASE_SECONDS + seconds_per_mb * megabytes:
+                violations.append(
+                    f'{name} {date}: {seconds:.3f}s for '
+                    f'{len(malformed):,} characters ({error or "parsed"})'
+                )
+    return slowest, violations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--seconds-per-mb', type=float,
+                        default=SECONDS_PER_MB)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--releases', type=int, default=RELEASES)
+    args = parser.parse_args()
+
+    if not (corpus := cached_corpus()):
+        raise SystemExit(NO_CORPUS)
+    dates = random.Random(args.seed).sample(
+        list(corpus), min(args.releases, len(corpus)))
+    texts = {x: extract_text_lxml(corpus[x]) for x in sorted(dates)}
+    slowest, violations = run(texts, args.seed, args.seconds_per_mb)
+    print(f'{len(texts)} cached releases')
+    for name, seconds_per_mb in slowest.items():
+        print(f'{name:>17}: slowest {seconds_per_mb:8.3f} s/MB')
+    if violations:
+        print('\n'.join(violations))
+        raise SystemExit(f'{len(violations)} releases exceeded the bound')
+    print(f'Every release parsed within {args.seconds_per_mb} s/MB')
+
+
+if __name__ == "__main__":
+    main()
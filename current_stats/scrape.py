@@ -1,13 +1,24 @@
+import json
 import os.path
+import pickle
 
 import bs4
 import pandas as pd
-import requests
 
 import lac_covid19.const as const
+import lac_covid19.transport as transport
 
 PAGE_URL = 'http://publichealth.lacounty.gov/media/Coronavirus/locations.htm'
 PAGE_HTML = os.path.join(os.path.dirname(__file__), 'locations.htm')
+PAGE_VALIDATORS = os.path.join(os.path.dirname(__file__), 'locations.json')
+PAGE_TABLES = os.path.join(os.path.dirname(__file__), 'locations.pickle')
+
+# Response headers identifying a version of the page, and the request headers
+# which ask the server to only send the page if it differs from that version.
+VALIDATOR_HEADERS = {
+    'ETag': 'If-None-Match',
+    'Last-Modified': 'If-Modified-Since',
+}
 
 ID_SUMMARY = 'case-summary'
 ID_RECENT = 'recent-trends'
@@ -19,22 +30,48 @@ ID_EDUCATION = 'educational-settings'
 OBS = 'Obs'
 
 
+def _page_version():
+    """Identifies the version of the cached page on disk."""
+    stat = os.stat(PAGE_HTML)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def refresh_page():
+    """Requests the 'Locations & Demographics' page only if it changed since
+        the cached copy was downloaded. The ETag and Last-Modified headers of
+        the cached copy are stored alongside it.
+    Returns: True if a new version of the page was downloaded.
+    """
+    headers = {}
+    if os.path.isfile(PAGE_HTML) and os.path.isfile(PAGE_VALIDATORS):
+        with open(PAGE_VALIDATORS) as f:
+            validators = json.load(f)
+        headers = {VALIDATOR_HEADERS[x]: validators[x] for x in validators}
+    r = transport.get(PAGE_URL, headers=headers)
+    if r.status_code == 304:
+        return False
+    if r.status_code == 200:
+        with open(PAGE_HTML, 'w') as f:
+            f.write(r.text)
+        with open(PAGE_VALIDATORS, 'w') as f:
+            json.dump({x: r.headers[x] for x in VALIDATOR_HEADERS
+                       if x in r.headers}, f, separators=const.JSON_COMPACT)
+        return True
+    raise ConnectionError('Non 200 HTTP Code while requesting LACDPH page')
+
+
 def fetch_page(cached=True):
     """Fetches the 'Locations & Demographics' page from LACDPH
     Args:
         cached: Indicates if a local cached version should be tried before
-            requesting the website online.
+            requesting the website online. Otherwise the website is asked for
+            the page only if it changed since it was cached.
     Returns: A BeautifulSoup object representing the page.
     """
-    if cached and os.path.isfile(PAGE_HTML):
-        with open(PAGE_HTML) as f:
-            return bs4.BeautifulSoup(f.read(), 'html.parser')
-    r = requests.get(PAGE_URL)
-    if r.status_code == 200:
-        with open(PAGE_HTML, 'w') as f:
-            f.write(r.text)
-        return bs4.BeautifulSoup(r.text, 'html.parser')
-    raise ConnectionError('Non 200 HTTP Code while requesting LACDPH page')
+    if not (cached and os.path.isfile(PAGE_HTML)):
+        refresh_page()
+    with open(PAGE_HTML) as f:
+        return bs4.BeautifulSoup(f.read(), 'html.parser')
 
 
 def table_html(html, id_, multi=False):
@@ -124,9 +161,31 @@ def parse_education(html):
     return parse_outbreaks(html, ID_EDUCATION)
 
 
+def _load_tables():
+    """Loads the previously parsed tables if they came from the cached page
+        currently on disk.
+    """
+    if os.path.isfile(PAGE_TABLES):
+        with open(PAGE_TABLES, 'rb') as f:
+            version, tables = pickle.load(f)
+        if version == _page_version():
+            return tables
+
+
 def query_live(cached=False):
-    page_html = fetch_page(cached)
-    return {
+    """Parses every table of the 'Locations & Demographics' page.
+    Args:
+        cached: Indicates if the cached page should be used without checking
+            the website for a newer version.
+    Returns: A dictionary of DataFrames. The tables are only parsed again when
+        the page differs from the one they were last parsed from.
+    """
+    if not (cached and os.path.isfile(PAGE_HTML)):
+        refresh_page()
+    if (tables := _load_tables()) is not None:
+        return tables
+    page_html = fetch_page()
+    tables = {
         const.AREA_TOTAL: parse_csa(page_html),
         const.AREA_RECENT: parse_recent(page_html),
         const.RESIDENTIAL: parse_residential(page_html),
@@ -134,6 +193,9 @@ def query_live(cached=False):
         const.HOMELESS: parse_homeless(page_html),
         const.EDUCATION: parse_education(page_html),
     }
+    with open(PAGE_TABLES, 'wb') as f:
+        pickle.dump((_page_version(), tables), f)
+    return tables
 
 
 if __name__ == "__main__":
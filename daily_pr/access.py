@@ -1,12 +1,21 @@
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from copy import deepcopy
+import functools
 import os.path
 import datetime as dt
 import json
+import threading
+import time
+from urllib.parse import urlsplit
 import bs4
+import lxml.html
 import requests
 import re
 import pickle
 
+import lac_covid19.transport as transport
+import lac_covid19.daily_pr.archive as archive
+import lac_covid19.daily_pr.fingerprint as fingerprint
 from lac_covid19.daily_pr.prid import PRID
 from lac_covid19.daily_pr.parse import parse_pr
 from lac_covid19.daily_pr.paths import *
@@ -14,8 +23,10 @@ from lac_covid19.const import DATE, AREA, JSON_COMPACT
 from lac_covid19.daily_pr.bad_data import SUBSTITUE_SORUCE, DATA_TYPOS
 
 _PICKLE_CACHE = os.path.join(DIR_PICKLE, 'parsed.pickle')
+_PICKLE_MANIFEST = os.path.join(DIR_PICKLE, 'parsed.json')
+_FINGERPRINT = 'fingerprint'
 
-_LACDPH_PR_URL = 'http://www.publichealth.lacounty.gov/phcommon/public/media/mediapubhpdetail.cfm?prid={}'  # pylint: disable=line-too-long
+LACDPH_PR_URL = 'http://www.publichealth.lacounty.gov/phcommon/public/media/mediapubhpdetail.cfm?prid={}'  # pylint: disable=line-too-long
 
 
 def _html_path(date):
@@ -26,58 +37,173 @@ def _json_path(date):
     return os.path.join(DIR_JSON, f'{date}.json')
 
 
-def _fetch_html(date):
+def cache_html(date, raw_html):
+    """Saves a downloaded webpage to the release archive or, if there is no
+        archive, to cached-html.
+    """
+    if os.path.isfile(HTML_INDEX):
+        archive.add(date, raw_html)
+    else:
+        with open(_html_path(date), 'w', encoding='utf-8') as f:
+            f.write(raw_html)
+
+
+def _fetch_html(date, url=LACDPH_PR_URL):
     """Fetches the webpage online and returns the html source as text."""
     date_prid = PRID.get(date)
     if date_prid is None:
         raise ValueError(f'No Press Release ID for {date_prid}')
-    r = requests.get(_LACDPH_PR_URL.format(date_prid))
+    r = transport.get(url.format(date_prid))
     if r.status_code == 200:
-        with open(_html_path(date), 'w') as f:
-            f.write(r.text)
-            return r.text
+        cache_html(date, r.text)
+        return r.text
     raise requests.exceptions.ConnectionError(
         f'Cannot get press release for {date}'
     )
 
 
-def load_html(date, cache=True):
-    """Loads the webpage and makes small edits defined in bad_data."""
+class _HostRateLimiter:
+    """Spaces out requests so no single host is sent more than a set number
+        of requests per second, regardless of how many threads are fetching.
+    """
+
+    def __init__(self, rate=None):
+        self._interval = 1 / rate if rate else 0
+        self._next_slot = {}
+        self._lock = threading.Lock()
+
+    def wait(self, host):
+        if not self._interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self._interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def fetch_all_html(dates=None, workers=8, rate_limit=None,
+                   url=LACDPH_PR_URL):
+    """Downloads every press release missing from the html cache using a
+        bounded pool of threads.
+    Args:
+        dates: The dates to fetch formated in ISO 8601 YYYY-MM-DD. Defaults to
+            every date with a known press release ID.
+        workers: The maximum number of requests in flight at once.
+        rate_limit: The maximum number of requests per second sent to a single
+            host. None places no limit.
+        url: A template of the press release address, formatted with the
+            press release ID.
+    Returns:
+        A list of the dates which were downloaded. A date which fails after
+        all retries is reported and skipped, so calling again resumes the
+        backfill where it left off.
+    """
+    missing = [x for x in (PRID if dates is None else dates)
+               if not (os.path.isfile(_html_path(x)) or archive.contains(x))]
+    limiter = _HostRateLimiter(rate_limit)
+
+    def fetch(date):
+        limiter.wait(urlsplit(url.format(PRID.get(date))).netloc)
+        try:
+            _fetch_html(date, url)
+        except requests.exceptions.RequestException as e:
+            print(f'{date}: {e}')
+            return None
+        return date
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        fetched = [x for x in executor.map(fetch, missing) if x is not None]
+    print(transport.latency_report(reset=True))
+    return fetched
+
+
+def extract_text_bs4(raw_html):
+    """The text of the entire webpage, as parsed by BeautifulSoup."""
+    return bs4.BeautifulSoup(raw_html, 'html.parser').get_text()
+
+
+_LXML_PARSER = lxml.html.HTMLParser(encoding='utf-8')
+_BOILERPLATE_TAGS = ('head', 'script', 'style', 'noscript', 'nav', 'header',
+                     'footer')
+# Whole class names and ids only, as the release's own tables have classes such
+#   as "tableheader".
+_BOILERPLATE_XPATH = '|'.join(
+    [f'//{x}' for x in _BOILERPLATE_TAGS]
+    + [f'//*[@id="{x}" or contains(concat(" ", normalize-space(@class), " "),'
+       f' " {x} ")]'
+       for x in ('nav', 'menu', 'header', 'footer', 'breadcrumb')]
+)
+_RE_RELEASE_START = re.compile('For\s+Immediate\s+Release')
+
+
+def extract_text_lxml(raw_html):
+    """The text of only the press release, as parsed by lxml. Site navigation,
+        headers, footers and scripts are removed, along with everything before
+        the release's "For Immediate Release" line. The text is otherwise the
+        same as extract_text_bs4 so the parser's regular expressions apply.
+    """
+    root = lxml.html.document_fromstring(raw_html.encode(), parser=_LXML_PARSER)
+    for element in root.xpath(_BOILERPLATE_XPATH):
+        # Never drop a container holding the release itself
+        if (element.getparent() is not None
+                and not _RE_RELEASE_START.search(element.text_content())):
+            element.drop_tree()
+    text = root.text_content()
+    if (start := _RE_RELEASE_START.search(text)):
+        return text[start.start():]
+    return text
+
+
+def load_html(date, cache=True, extract_text=extract_text_lxml):
+    """Loads the webpage and makes small edits defined in bad_data. A cached
+        webpage is read from cached-html or, failing that, the compressed
+        release archive. extract_text converts the html to the text which is
+        parsed.
+    """
     raw_html = None
     date_html = _html_path(date)
     if cache and os.path.isfile(date_html):
-        with open(date_html) as f:
+        with open(date_html, encoding='utf-8') as f:
             raw_html = f.read()
-    else:
+    elif not (cache and (raw_html := archive.read(date)) is not None):
         raw_html = _fetch_html(date)
     if date in SUBSTITUE_SORUCE:
         for swap_instructions in SUBSTITUE_SORUCE[date]:
             raw_html = re.sub(swap_instructions[0], swap_instructions[1],
                               raw_html)
-    return bs4.BeautifulSoup(raw_html, 'html.parser').get_text()
+    return extract_text(raw_html)
 
 
-def _write_json(pr_dict):
+def _write_json(pr_dict, fingerprints):
     pr_dict = deepcopy(pr_dict)
     pr_dict[DATE] = pr_dict[DATE].isoformat()
+    pr_dict[_FINGERPRINT] = fingerprints
     with open(_json_path(pr_dict[DATE]), 'w') as f:
         json.dump(pr_dict, f, separators=JSON_COMPACT)
 
 
 def _load_json(date):
+    """Reads a parsed press release and the fingerprint of each of its keys.
+        Releases cached before fingerprints were recorded have none.
+    """
     if os.path.isfile(date_json := _json_path(date)):
         pr_dict = None
         with open(date_json) as f:
             pr_dict = json.load(f)
+        fingerprints = pr_dict.pop(_FINGERPRINT, {})
         pr_dict[DATE] = dt.date.fromisoformat(pr_dict[DATE])
         for i in range(len(pr_dict[AREA])):
             pr_dict[AREA][i] = tuple(pr_dict[AREA][i])
         pr_dict[AREA] = tuple(pr_dict[AREA])
-        return pr_dict
+        return pr_dict, fingerprints
 
 
 def query_date(date, json_cache=True, html_cache=True):
-    """Queries a single press release
+    """Queries a single press release. A cached parsed json is used as long as
+        the parser and corrections in bad_data which made it are unchanged,
+        otherwise only the keys whose fingerprint changed are parsed again.
     Args:
         date: A specified date formated in ISO 8601 YYYY-MM-DD
         json_cache: Tries to read a cached parsed json first
@@ -85,32 +211,142 @@ def query_date(date, json_cache=True, html_cache=True):
     Returns:
         A dictionary of data from a press release.
     """
-    if json_cache and (pr := _load_json(date)):
-        return pr
-    pr = parse_pr(load_html(date, html_cache))
+    fingerprints = fingerprint.release(date)
+    pr, stale = {}, None
+    if json_cache and (cached := _load_json(date)):
+        pr, cached_fingerprints = cached
+        stale = [x for x in fingerprints
+                 if cached_fingerprints.get(x) != fingerprints[x]]
+        if not stale:
+            return pr
+    pr.update(parse_pr(load_html(date, html_cache), stale))
     assert date == pr[DATE].isoformat()
     if date in DATA_TYPOS:
         keys_value = DATA_TYPOS[date]
         pr[keys_value[0]][keys_value[1]] = keys_value[2]
-    _write_json(pr)
+    _write_json(pr, fingerprints)
     return pr
 
 
-def query_all(pickle_cache=True, json_cache=True):
+def _atomic_write(path, mode, write):
+    """Writes to a temporary file then moves it into place, so readers never
+        see a partially written file.
+    """
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, mode) as f:
+        write(f)
+    os.replace(tmp_path, path)
+
+
+def _release_version(date):
+    """The press release ID and fingerprint a parsed press release is from."""
+    return [PRID.get(date), fingerprint.release_digest(date)]
+
+
+def _load_pickle_cache():
+    """Loads the pickled press releases with the manifest of the press
+        release IDs and fingerprints they were parsed from. Pickles from before
+        the manifest, or with a manifest of press release IDs alone, have an
+        empty manifest so every release is checked again.
+    """
+    with open(_PICKLE_CACHE, 'rb') as f:
+        data = pickle.load(f)
+    manifest = {}
+    if os.path.isfile(_PICKLE_MANIFEST):
+        with open(_PICKLE_MANIFEST) as f:
+            manifest = json.load(f)
+    return data, manifest
+
+
+def _write_pickle_cache(data):
+    _atomic_write(_PICKLE_CACHE, 'wb', lambda f: pickle.dump(data, f))
+    manifest = {x: _release_version(x)
+                for x in (pr[DATE].isoformat() for pr in data)}
+    _atomic_write(_PICKLE_MANIFEST, 'w',
+                  lambda f: json.dump(manifest, f, separators=JSON_COMPACT))
+
+
+def query_dates(dates, json_cache=True, html_cache=True, jobs=None):
+    """Queries many press releases, optionally spread across processes.
+    Args:
+        dates: The dates to query formated in ISO 8601 YYYY-MM-DD.
+        json_cache: Tries to read a cached parsed json first
+        html_cache: Tries to read a cached webpage first
+        jobs: The number of processes loading and parsing press releases. None
+            or 1 queries every date in this process.
+    Returns:
+        A list of dictionaries of data from press releases in the same order
+        as dates.
+    """
+    dates = list(dates)
+    query = functools.partial(query_date, json_cache=json_cache,
+                              html_cache=html_cache)
+    if not jobs or jobs == 1 or len(dates) < 2:
+        return [query(x) for x in dates]
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        return list(executor.map(query, dates,
+                                 chunksize=max(1, len(dates) // (4 * jobs))))
+
+
+def iter_press_releases(start=None, end=None, json_cache=True,
+                        html_cache=True):
+    """Yields press releases one at a time in date order, so a range of days
+        can be processed without holding every release in memory.
+    Args:
+        start: The first date, inclusive, as a date or formated in ISO 8601
+            YYYY-MM-DD. Defaults to the first press release.
+        end: The last date, inclusive. Defaults to the latest press release.
+        json_cache: Tries to read a cached parsed json first
+        html_cache: Tries to read a cached webpage first
+    """
+    start = None if start is None else str(start)
+    end = None if end is None else str(end)
+    for date in sorted(PRID):
+        if start is not None and date < start:
+            continue
+        if end is not None and date > end:
+            break
+        yield query_date(date, json_cache, html_cache)
+
+
+def query_all(pickle_cache=True, json_cache=True, fetch_workers=None,
+              rate_limit=None, incremental=True, jobs=None):
     """Queries all press releases.
     Args:
         pickle_cache: Tries to load a python pickle file to avoid needing to
             read through all the json files.
         json_cache: Tries to read already parsed json's of press releases.
+        fetch_workers: If set, every uncached press release is downloaded
+            concurrently with this many threads before parsing begins.
+        rate_limit: The maximum requests per second when fetching concurrently.
+        incremental: When the pickle is used, only press releases missing from
+            it, or whose press release ID or fingerprint changed, are queried
+            and added. Otherwise the pickle is returned as is.
+        jobs: The number of processes used to load and parse press releases.
     Returns:
         A list of python dictonaries of parsed json.
     """
+    cached = {}
     if pickle_cache and json_cache and os.path.isfile(_PICKLE_CACHE):
-        with open(_PICKLE_CACHE, 'rb') as f:
-            return pickle.load(f)
-    data = [query_date(x, json_cache) for x in PRID]
-    with open(_PICKLE_CACHE, 'wb') as f:
-        pickle.dump(data, f)
+        data, manifest = _load_pickle_cache()
+        if not incremental:
+            return data
+        for pr in data:
+            date = pr[DATE].isoformat()
+            if date in PRID and manifest.get(date) == _release_version(date):
+                cached[date] = pr
+        if len(cached) == len(data) == len(PRID):
+            return data
+    missing = [x for x in PRID if x not in cached]
+    if fetch_workers:
+        fetch_all_html(
+            [x for x in missing
+             if not (json_cache and os.path.isfile(_json_path(x)))],
+            fetch_workers, rate_limit
+        )
+    cached.update(zip(missing, query_dates(missing, json_cache, jobs=jobs)))
+    data = [cached[x] for x in PRID]
+    _write_pickle_cache(data)
     return data
 
 
@@ -0,0 +1,232 @@
+"""Stores every cached press release webpage in a single compressed archive.
+
+Each release is compressed on its own, against a dictionary shared by all
+    releases, so the site boilerplate repeated on every page is only stored
+    once and any single release can be read without decompressing the others.
+    The dictionary is stored in the archive, so it is sized to a hundredth of
+    the pages it is trained on and left out for too few pages, where it would
+    cost more than it saves. An index next to the archive maps each date to
+    the position of its release. Zstandard is used if the optional zstandard
+    package is installed, otherwise zlib.
+
+Once an archive is built, downloaded pages are only added to the archive, and
+    rebuilding it keeps the pages it holds.
+"""
+
+import contextlib
+import json
+import os
+import os.path
+import threading
+import zlib
+from typing import Dict, Iterable, List, Optional
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+from lac_covid19.const import JSON_COMPACT
+from lac_covid19.daily_pr.paths import DIR_HTML, HTML_ARCHIVE, HTML_INDEX
+
+ZSTD, ZLIB = 'zstd', 'zlib'
+DICT_SIZE = 112_640  # The largest dictionary
+DICT_RATIO = 100  # Bytes of pages for each byte of dictionary
+MIN_DICT_SIZE = 4_096
+ZSTD_LEVEL = 19
+ZLIB_LEVEL = 9
+_ZLIB_DICT_HALF = 16_384  # zlib only uses the last 32 KiB of a dictionary
+
+_loaded = {}
+_lock = threading.Lock()
+
+
+@contextlib.contextmanager
+def _locked():
+    """Holds the archive against other threads and, where files can be
+        locked, against other processes such as the workers of
+        access.query_dates().
+    """
+    with _lock:
+        if fcntl is None:
+            yield
+            return
+        with open(f'{HTML_INDEX}.lock', 'w') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _cached_dates() -> List[str]:
+    """The dates of the pages in cached-html and in the archive."""
+    dates = {x[:-5] for x in os.listdir(DIR_HTML) if x.endswith('.html')}
+    if (loaded := _load()) is not None:
+        dates.update(loaded['index']['releases'])
+    return sorted(dates)
+
+
+def _read_cached(date: str) -> bytes:
+    path = os.path.join(DIR_HTML, f'{date}.html')
+    if not os.path.isfile(path):
+        return read(date).encode('utf-8')
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def _train_dictionary(codec: str, samples: List[bytes]) -> bytes:
+    """A dictionary of the content shared by pages, or empty if there are too
+        few pages for one to pay for itself.
+    """
+    size = min(DICT_SIZE, sum(len(x) for x in samples) // DICT_RATIO)
+    if size < MIN_DICT_SIZE:
+        return b''
+    if codec == ZSTD:
+        try:
+            return zstandard.train_dictionary(size, samples).as_bytes()
+        except zstandard.ZstdError:
+            return b''  # Too few releases to train on
+    # The beginning and end of the newest page hold the site navigation and
+    # footer shared by every release.
+    half = min(_ZLIB_DICT_HALF, size // 2)
+    return samples[-1][:half] + samples[-1][-half:]
+
+
+def _compressor(codec: str, dictionary: bytes):
+    if codec == ZSTD:
+        return zstandard.ZstdCompressor(
+            level=ZSTD_LEVEL,
+            dict_data=(zstandard.ZstdCompressionDict(dictionary)
+                       if dictionary else None)
+        ).compress
+
+    def compress(data):
+        c = zlib.compressobj(ZLIB_LEVEL, **({'zdict': dictionary}
+                                            if dictionary else {}))
+        return c.compress(data) + c.flush()
+
+    return compress
+
+
+def _decompressor(codec: str, dictionary: bytes):
+    if codec == ZSTD:
+        return zstandard.ZstdDecompressor(
+            dict_data=(zstandard.ZstdCompressionDict(dictionary)
+                       if dictionary else None)
+        ).decompress
+
+    def decompress(data):
+        d = zlib.decompressobj(**({'zdict': dictionary} if dictionary else {}))
+        return d.decompress(data) + d.flush()
+
+    return decompress
+
+
+def _write_index(index: Dict) -> None:
+    tmp_path = f'{HTML_INDEX}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(index, f, separators=JSON_COMPACT, sort_keys=True)
+    os.replace(tmp_path, HTML_INDEX)
+    _loaded.clear()
+
+
+def build(dates: Optional[Iterable[str]] = None,
+          codec: Optional[str] = None) -> Dict:
+    """Compresses cached press release webpages into a new archive.
+    Args:
+        dates: The dates to include. Defaults to every page in cached-html
+            and in the current archive.
+        codec: Either ZSTD or ZLIB. Defaults to ZSTD when available.
+    Returns:
+        The index of the new archive.
+    """
+    with _locked():
+        return _build(dates, codec)
+
+
+def _build(dates, codec):
+    codec = codec or (ZSTD if zstandard is not None else ZLIB)
+    dates = sorted(_cached_dates() if dates is None else dates)
+    pages = [_read_cached(x) for x in dates]
+    dictionary = _train_dictionary(codec, pages)
+    compress = _compressor(codec, dictionary)
+    index = {'codec': codec, 'dictionary': [0, len(dictionary)],
+             'releases': {}}
+    tmp_path = f'{HTML_ARCHIVE}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(dictionary)
+        for date, page in zip(dates, pages):
+            blob = compress(page)
+            index['releases'][date] = [f.tell(), len(blob)]
+            f.write(blob)
+    os.replace(tmp_path, HTML_ARCHIVE)
+    _write_index(index)
+    return index
+
+
+def _load():
+    """Reads the index and prepares the decompressor, reusing them until the
+        index changes on disk.
+    """
+    if not os.path.isfile(HTML_INDEX):
+        return None
+    version = os.stat(HTML_INDEX).st_mtime_ns
+    if _loaded.get('version') != version:
+        with open(HTML_INDEX) as f:
+            index = json.load(f)
+        with open(HTML_ARCHIVE, 'rb') as f:
+            f.seek(index['dictionary'][0])
+            dictionary = f.read(index['dictionary'][1])
+        _loaded.clear()
+        _loaded.update(version=version, index=index, dictionary=dictionary,
+                       decompress=_decompressor(index['codec'], dictionary))
+    return _loaded
+
+
+def contains(date: str) -> bool:
+    loaded = _load()
+    return loaded is not None and date in loaded['index']['releases']
+
+
+def read(date: str) -> Optional[str]:
+    """Decompresses a single press release webpage from the archive.
+    Returns:
+        The html source as text or None if the date is not archived.
+    """
+    if (loaded := _load()) is None:
+        return None
+    position = loaded['index']['releases'].get(date)
+    if position is None:
+        return None
+    with open(HTML_ARCHIVE, 'rb') as f:
+        f.seek(position[0])
+        return loaded['decompress'](f.read(position[1])).decode('utf-8')
+
+
+def add(date: str, raw_html: str) -> None:
+    """Appends a release to an existing archive using its dictionary."""
+    with _locked():
+        # Another process may have added a release within the resolution of
+        # the index's modification time.
+        _loaded.clear()
+        if (loaded := _load()) is None:
+            raise FileNotFoundError(f'No archive at {HTML_ARCHIVE}')
+        index = loaded['index']
+        compress = _compressor(index['codec'], loaded['dictionary'])
+        blob = compress(raw_html.encode('utf-8'))
+        with open(HTML_ARCHIVE, 'ab') as f:
+            index['releases'][date] = [f.tell(), len(blob)]
+            f.write(blob)
+        _write_index(index)
+
+
+if __name__ == "__main__":
+    archive_index = build()
+    raw_size = sum(len(_read_cached(x)) for x in archive_index['releases'])
+    print(f"{len(archive_index['releases'])} releases: {raw_size:,} bytes -> "
+          f"{os.path.getsize(HTML_ARCHIVE):,} bytes ({archive_index['codec']})")
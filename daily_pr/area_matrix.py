@@ -0,0 +1,270 @@
+"""Time series of many areas held as 2-D arrays, one row for each date and one
+    column for each area, so differences, rolling averages and rates are
+    computed for every area at once rather than group by group.
+
+An area may not be reported in every press release. Cells of unreported dates
+    are marked absent, and differences and rolling averages are taken over the
+    dates each area was reported on, as a grouped pandas diff() and
+    rolling().mean() over the long table would. ffill_missing() fills in the
+    days between an area's reports instead, so they are taken over days. Long
+    tables are only made again by to_long().
+
+Each cell holds one row. Should an area have more than one row on a date, a
+    matrix is only made if told to sum them, as regions are summed from areas.
+"""
+
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+import lac_covid19.const as const
+
+DATE = const.DATE
+AREA = const.AREA
+# Ways of pivoting more than one row of an area on a date
+RAISE, SUM = 'raise', 'sum'
+
+
+class AreaMatrix:
+    """Columns of a long time series pivoted to date by area arrays.
+    Attributes:
+        dates: The date of each row.
+        areas: The name of each column, sorted.
+        present: Whether an area has a row on a date.
+        values: A date by area array for each column of the long table.
+    """
+
+    def __init__(self, dates: pd.DatetimeIndex, areas: np.ndarray,
+                 present: np.ndarray, values: Dict[str, np.ndarray]):
+        self.dates = dates
+        self.areas = areas
+        self.present = present
+        self.values = values
+        # The number of reports of each area up to every date, and the row of
+        # each area's nth report, with -1 for the 0th.
+        self._ranks = np.cumsum(present, axis=0)
+        self._row_of_rank = np.full((len(dates) + 1, len(areas)), -1)
+        rows, cols = np.nonzero(present)
+        self._row_of_rank[self._ranks[rows, cols], cols] = rows
+
+    @classmethod
+    def from_arrays(cls, dates: np.ndarray, areas: np.ndarray,
+                    columns: Dict[str, np.ndarray],
+                    duplicates: str = RAISE) -> 'AreaMatrix':
+        """Pivots the columns of a long time series given as arrays. Numeric
+            columns become float arrays with NaN for missing values, others,
+            including booleans, object arrays.
+        Args:
+            dates: The date of each row.
+            areas: The area of each row. Rows without an area are left out.
+            columns: The values of each row by column name.
+            duplicates: What to do should an area have more than one row on a
+                date. RAISE raises a ValueError. SUM adds up the rows, as a
+                groupby().sum() would, so a value is NaN only if it is missing
+                from every row; every column must then be numeric.
+        """
+        if duplicates not in (RAISE, SUM):
+            raise ValueError(f'Unknown duplicates {duplicates!r}')
+        date_codes, unique_dates = pd.factorize(dates, sort=True)
+        area_codes, unique_areas = pd.factorize(areas, sort=True)
+        shape = (len(unique_dates), len(unique_areas))
+        # Only rows to be left out are filtered, so the columns are usually
+        # read without a copy.
+        keep = area_codes >= 0
+        if keep.all():
+            keep = slice(None)
+        date_codes, area_codes = date_codes[keep], area_codes[keep]
+        cells = date_codes.astype(np.int64) * shape[1] + area_codes
+        repeated = pd.Series(cells).duplicated().to_numpy()
+        if duplicates == RAISE and repeated.any():
+            row = np.flatnonzero(repeated)[0]
+            raise ValueError(
+                f'More than one row of {unique_areas[area_codes[row]]} on '
+                f'{unique_dates[date_codes[row]]}')
+        present = np.zeros(shape, dtype=bool)
+        present[date_codes, area_codes] = True
+        values = {}
+        for column, series in columns.items():
+            series = pd.Series(series)
+            if (pd.api.types.is_numeric_dtype(series)
+                    and not pd.api.types.is_bool_dtype(series)):
+                column_values = series.to_numpy(dtype=float,
+                                                na_value=np.nan)[keep]
+                if repeated.any():
+                    array = _sum_cells(cells, column_values, shape)
+                else:
+                    array = np.full(shape, np.nan)
+                    array[date_codes, area_codes] = column_values
+            elif repeated.any():
+                raise ValueError(f'Cannot sum {column}, which is not numeric')
+            else:
+                array = np.full(shape, None, dtype=object)
+                array[date_codes, area_codes] = series.to_numpy(
+                    dtype=object)[keep]
+            values[column] = array
+        return cls(pd.DatetimeIndex(unique_dates),
+                   np.asarray(unique_areas, dtype=object), present, values)
+
+    @classmethod
+    def from_long(cls, df: pd.DataFrame, columns: Iterable[str],
+                  area_col: str = AREA, duplicates: str = RAISE
+                  ) -> 'AreaMatrix':
+        """Pivots a long time series as from_arrays().
+        Args:
+            df: A table with date and area columns.
+            columns: The columns to pivot.
+            area_col: The column naming the area of each row.
+            duplicates: RAISE or SUM, as from_arrays().
+        """
+        return cls.from_arrays(df[DATE].to_numpy(),
+                               df[area_col].to_numpy(dtype=object),
+                               {x: df[x] for x in columns}, duplicates)
+
+    def _previous_rows(self, lag: int) -> np.ndarray:
+        """The row of the date each area was reported lag reports before
+            every cell, or -1 if there is none.
+        """
+        previous = np.maximum(self._ranks - lag, 0)
+        return np.where(
+            self._ranks > lag,
+            self._row_of_rank[previous, np.arange(len(self.areas))], -1
+        )
+
+    def _shifted(self, values: np.ndarray, lag: int) -> np.ndarray:
+        """The values lag reports before every cell, NaN where there are
+            none.
+        """
+        rows = self._previous_rows(lag)
+        shifted = values[np.maximum(rows, 0), np.arange(len(self.areas))]
+        return np.where(rows >= 0, shifted, np.nan)
+
+    def diff(self, values: np.ndarray) -> np.ndarray:
+        """The change since each area's previous report."""
+        return np.where(self.present, values - self._shifted(values, 1),
+                        np.nan)
+
+    def rolling_mean(self, values: np.ndarray, window: int) -> np.ndarray:
+        """The mean of the last window reports of each area, NaN unless all
+            of them have a value.
+        """
+        # Summed from the oldest report, as a rolling window is.
+        total = self._shifted(values, window - 1)
+        for lag in range(window - 2, -1, -1):
+            total = total + self._shifted(values, lag)
+        return np.where(self.present, total / window, np.nan)
+
+    def ffill(self, values: np.ndarray, columns: np.ndarray) -> np.ndarray:
+        """Fills the missing values of some areas with each area's previous
+            value.
+        Args:
+            values: A date by area array.
+            columns: Whether to fill each area.
+        """
+        rows = _last_rows(self.present & ~np.isnan(values))
+        filled = values[np.maximum(rows, 0), np.arange(len(self.areas))]
+        return np.where(self.present & (rows >= 0) & columns, filled, values)
+
+    def ffill_missing(self) -> 'AreaMatrix':
+        """A matrix with a row for every day, in which each area is present
+            from its first report to its last, as covid_tools fills groups
+            with ffill_missing. The days an area was not reported on take its
+            previous report, and its missing numeric values its previous
+            value, so differences and rolling averages are taken over days.
+        """
+        if not len(self.dates):
+            return self
+        dates = pd.date_range(self.dates[0], self.dates[-1])
+        shape = (len(dates), len(self.areas))
+        rows = dates.get_indexer(self.dates)
+        reported = np.zeros(shape, dtype=bool)
+        reported[rows] = self.present
+        # Reported on or before, and on or after, each day
+        present = (np.maximum.accumulate(reported, axis=0)
+                   & np.maximum.accumulate(reported[::-1], axis=0)[::-1])
+        cols = np.arange(len(self.areas))
+        values = {}
+        for column, array in self.values.items():
+            spread = np.full(shape, np.nan if array.dtype != object else None,
+                             dtype=array.dtype)
+            spread[rows] = array
+            valid = reported
+            if array.dtype != object:
+                valid = reported & ~np.isnan(spread)
+            previous = _last_rows(valid)
+            values[column] = np.where(present & (previous >= 0),
+                                      spread[np.maximum(previous, 0), cols],
+                                      spread)
+        return AreaMatrix(dates, self.areas, present, values)
+
+    def combine(self, incidence: np.ndarray,
+                names: Iterable[str]) -> 'AreaMatrix':
+        """Sums areas into groups, with a column for each group. Missing
+            values count as zero, and columns which are not numeric are left
+            out.
+        Args:
+            incidence: An area by group array, 1 where an area is in a group.
+                An area may be in any number of groups.
+            names: The name of each group.
+        """
+        values = {x: np.nan_to_num(y) @ incidence
+                  for x, y in self.values.items() if y.dtype != object}
+        present = (self.present.astype(float) @ incidence) > 0
+        return AreaMatrix(self.dates, np.array(list(names), dtype=object),
+                          present, values)
+
+    def group(self, groups: np.ndarray,
+              names: Optional[Iterable[str]] = None) -> 'AreaMatrix':
+        """Sums areas into groups, such as regions, where each area is in at
+            most one group.
+        Args:
+            groups: The group of each area, or None for areas in no group.
+            names: The groups to keep, in order. Defaults to every group
+                present, sorted.
+        """
+        groups = pd.Series(groups, dtype=object)
+        if names is None:
+            names = sorted(groups.dropna().unique())
+        names = list(names)
+        incidence = (groups.to_numpy()[:, np.newaxis]
+                     == np.array(names, dtype=object)).astype(float)
+        return self.combine(incidence, names)
+
+    def to_long(self, columns: Dict[str, np.ndarray],
+                area_col: str = AREA) -> pd.DataFrame:
+        """A long table of the present cells sorted by date and then area.
+        Args:
+            columns: The arrays to export, in column order.
+            area_col: The name of the area column.
+        """
+        rows, cols = np.nonzero(self.present)
+        df = pd.DataFrame({DATE: self.dates[rows],
+                           area_col: self.areas[cols]})
+        for name, values in columns.items():
+            df[name] = values[rows, cols]
+        return df
+
+
+def _last_rows(valid: np.ndarray) -> np.ndarray:
+    """The last row of each column on or before every cell where it is
+        valid, or -1 if there is none.
+    """
+    rows = np.where(valid, np.arange(len(valid))[:, np.newaxis], -1)
+    return np.maximum.accumulate(rows, axis=0)
+
+
+def _sum_cells(cells: np.ndarray, values: np.ndarray,
+               shape: Tuple[int, int]) -> np.ndarray:
+    """Sums the values of each cell of a date by area array, NaN for cells
+        without a value.
+    """
+    size = shape[0] * shape[1]
+    valid = ~np.isnan(values)
+    sums = np.bincount(cells[valid], values[valid], minlength=size)
+    counts = np.bincount(cells[valid], minlength=size)
+    return np.where(counts > 0, sums, np.nan).reshape(shape)
+
+
+def per_capita(values: np.ndarray, population: np.ndarray) -> np.ndarray:
+    """Values per RATE_SCALE people, given the population of each column."""
+    return values / population * const.RATE_SCALE
@@ -0,0 +1,94 @@
+"""Discovers the press release IDs of new daily COVID-19 news releases.
+
+Press release IDs are numbered in order of publication, so only the pages
+    after the last known PRID are requested. They are probed in concurrent
+    batches over the pooled transport until a run of IDs in a row has no
+    release at all. Pages found to be daily COVID-19 releases are added to the
+    saved map and to the html cache, so they are not downloaded again.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+import functools
+from typing import Dict, Optional, Tuple
+
+import requests
+
+import lac_covid19.const as const
+import lac_covid19.transport as transport
+import lac_covid19.daily_pr.access as access
+import lac_covid19.daily_pr.parse as parse
+import lac_covid19.daily_pr.prid as prid
+
+BATCH_SIZE = 8
+MAX_GAP = 24  # IDs in a row without a release before the crawl stops
+
+# Sections every daily COVID-19 release has
+_DAILY_ANCHORS = (parse.ANCHOR_DATE, parse.ANCHOR_HOSPITALIZATIONS,
+                  parse.ANCHOR_CSA)
+
+
+def _probe(press_release_id: int,
+           url: str = access.LACDPH_PR_URL
+           ) -> Tuple[Optional[str], Optional[str]]:
+    """Requests the page of a single press release ID.
+    Returns:
+        The html source, or None if there is no release with the ID, and the
+        date formated in ISO 8601 YYYY-MM-DD if it is a daily COVID-19
+        release, otherwise None.
+    """
+    r = transport.get(url.format(press_release_id))
+    if r.status_code != 200:
+        return None, None
+    pr_txt = access.extract_text_lxml(r.text)
+    anchors = parse.locate_sections(pr_txt)
+    if not anchors[parse.ANCHOR_DATE]:
+        return None, None
+    if not (all(anchors[x] for x in _DAILY_ANCHORS)
+            and parse.match_at_anchor(pr_txt, anchors, parse.ANCHOR_DATE,
+                                      parse.RE_PR_DATE)):
+        return r.text, None
+    return r.text, parse.parse_pr(pr_txt, keys=())[const.DATE].isoformat()
+
+
+def discover(workers: int = BATCH_SIZE, max_gap: int = MAX_GAP,
+             url: str = access.LACDPH_PR_URL,
+             save: bool = True) -> Dict[str, int]:
+    """Finds daily COVID-19 releases published after the last known PRID.
+    Args:
+        workers: The number of IDs requested at once.
+        max_gap: The crawl ends after this many IDs in a row have no release.
+        url: A template of the press release address, formatted with the
+            press release ID.
+        save: Adds the releases found to PRID and saves it to prid.json.
+    Returns:
+        A dictionary of the date of each new release to its press release ID.
+        If a request fails after all retries, the crawl stops before that ID,
+        so calling again resumes from it.
+    """
+    next_id = max(prid.PRID.values()) + 1
+    probe = functools.partial(_probe, url=url)
+    found = {}
+    gap = 0
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        while gap < max_gap:
+            try:
+                for raw_html, date in executor.map(
+                        probe, range(next_id, next_id + workers)):
+                    gap = 0 if raw_html is not None else gap + 1
+                    if not (date is None or date in prid.PRID
+                            or date in found):
+                        found[date] = next_id
+                        access.cache_html(date, raw_html)
+                    next_id += 1
+            except requests.exceptions.RequestException as e:
+                print(f'{next_id}: {e}')
+                break
+    print(transport.latency_report(reset=True))
+    if save and found:
+        prid.add(found)
+    return found
+
+
+if __name__ == "__main__":
+    for new_date, new_id in discover().items():
+        print(new_date, new_id)
@@ -0,0 +1,159 @@
+"""Fingerprints of the code and corrections which produce cached data, so a
+    cache made by an older parser or with older corrections is detected.
+
+Each key of a parsed press release is fingerprinted on its own. A key's
+    fingerprint covers the bytecode of its parser and of every function,
+    regular expression and constant of this package the parser reads, followed
+    recursively, together with the corrections in bad_data for that date
+    only. Editing one regular expression therefore only invalidates the keys
+    parsed with it, and editing one DATA_TYPOS entry only invalidates that
+    key on that date.
+"""
+
+import datetime
+import functools
+import hashlib
+import re
+import types
+from typing import Any, Dict, Iterable
+
+import numpy as np
+import pandas as pd
+
+import lac_covid19.const as const
+import lac_covid19.daily_pr.parse as parse
+from lac_covid19.daily_pr.bad_data import (DATA_TYPOS,
+                                           HARDCODE_NEW_CASES_DEATHS,
+                                           SUBSTITUE_SORUCE)
+
+PACKAGE = 'lac_covid19'
+KEYS = tuple(parse.PARSERS)
+
+# Corrections made for a single date, which are fingerprinted by date rather
+# than as part of the code reading them.
+_PER_DATE = {id(x) for x in (DATA_TYPOS, HARDCODE_NEW_CASES_DEATHS,
+                             SUBSTITUE_SORUCE)}
+
+# Values whose repr() is their contents, and so the same in every process.
+_LITERALS = (type(None), bool, int, float, complex, str, bytes, type(...),
+             datetime.date, datetime.time, datetime.timedelta, np.generic)
+
+
+def digest(*parts: Any) -> str:
+    return hashlib.sha256(repr(parts).encode()).hexdigest()[:16]
+
+
+def _code_names(code: types.CodeType) -> Iterable[str]:
+    """Global and attribute names read by code, including nested functions and
+        comprehensions.
+    """
+    yield from code.co_names
+    for x in code.co_consts:
+        if isinstance(x, types.CodeType):
+            yield from _code_names(x)
+
+
+def _type_name(value: Any) -> str:
+    return f'{type(value).__module__}.{type(value).__qualname__}'
+
+
+def _canonical(value: Any, seen: set) -> Any:
+    """A stable representation of a value, following functions into the code
+        and values they read. Only values which are the same in every process
+        are represented by their contents. Other objects, such as locks and
+        parsers, are represented by their type, as their repr() holds their
+        memory address.
+    """
+    if isinstance(value, types.CodeType):
+        return (value.co_code.hex(), value.co_names,
+                [_canonical(x, seen) for x in value.co_consts])
+    if isinstance(value, types.FunctionType):
+        return _function(value, seen)
+    if isinstance(value, classmethod):
+        return _function(value.__func__, seen)
+    if isinstance(value, re.Pattern):
+        return (value.pattern, value.flags)
+    if isinstance(value, dict):
+        return [(_canonical(k, seen), _canonical(v, seen))
+                for k, v in value.items()]
+    if isinstance(value, (list, tuple)):
+        return [_canonical(x, seen) for x in value]
+    if isinstance(value, (set, frozenset)):
+        return sorted(repr(_canonical(x, seen)) for x in value)
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return value.to_csv()
+    if isinstance(value, np.ndarray):
+        return (str(value.dtype), _canonical(value.tolist(), seen))
+    if isinstance(value, _LITERALS):
+        return repr(value)
+    if isinstance(value, type):
+        return f'{value.__module__}.{value.__qualname__}'
+    return _type_name(value)
+
+
+def _function(func: types.FunctionType, seen: set) -> Any:
+    name = f'{func.__module__}.{func.__qualname__}'
+    if not func.__module__.startswith(PACKAGE) or id(func) in seen:
+        return name
+    seen.add(id(func))
+    names = sorted(set(_code_names(func.__code__)))
+    parts = [name, _canonical(func.__code__, seen),
+             _canonical(func.__defaults__, seen)]
+    for x in names:
+        if (value := func.__globals__.get(x, parts)) is parts:
+            continue  # A builtin or an attribute name
+        if isinstance(value, types.ModuleType):
+            if value.__name__.startswith(PACKAGE):
+                # Attributes read from a module of this package
+                parts.extend(
+                    (f'{x}.{y}', _canonical(getattr(value, y), seen))
+                    for y in names if hasattr(value, y)
+                    and not isinstance(getattr(value, y), types.ModuleType)
+                    and id(getattr(value, y)) not in _PER_DATE
+                )
+        elif isinstance(value, type):
+            if value.__module__.startswith(PACKAGE):
+                # Classes of this package are followed into their methods.
+                parts.append((x, [(k, _canonical(v, seen)) for k, v in
+                                  sorted(vars(value).items())
+                                  if isinstance(v, (types.FunctionType,
+                                                    classmethod))]))
+        elif id(value) not in _PER_DATE:
+            parts.append((x, _canonical(value, seen)))
+    return parts
+
+
+@functools.lru_cache(maxsize=None)
+def code(func: types.FunctionType) -> str:
+    """Fingerprint of a function and everything in this package it reads."""
+    return digest(_function(func, set()))
+
+
+@functools.lru_cache(maxsize=None)
+def _key_code(key: str) -> str:
+    from lac_covid19.daily_pr.access import extract_text_lxml
+    # Every key also depends on the text extraction, the section anchors and
+    # the date.
+    return digest(code(parse.PARSERS[key]), code(extract_text_lxml),
+                  code(parse.locate_sections), code(parse._parse_date))
+
+
+def _corrections(date: str, key: str) -> Any:
+    corrections = [SUBSTITUE_SORUCE.get(date)]
+    if key in (const.NEW_CASES, const.NEW_DEATHS):
+        corrections.append(HARDCODE_NEW_CASES_DEATHS.get(date))
+    if (typo := DATA_TYPOS.get(date)) is not None and typo[0] == key:
+        corrections.append(typo)
+    return corrections
+
+
+def release(date: str) -> Dict[str, str]:
+    """Fingerprints of each key of the press release of a date formated in ISO
+        8601 YYYY-MM-DD.
+    """
+    return {x: digest(_key_code(x), _corrections(date, x)) for x in KEYS}
+
+
+def release_digest(date: str) -> str:
+    """A single fingerprint of every key of a press release."""
+    return digest(sorted(release(date).items()))
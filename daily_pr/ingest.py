@@ -0,0 +1,94 @@
+"""Converts parsed press releases into a long table for each section of the
+    press release, which every time series builder reads. The dates of every
+    release are converted once and shared by all tables, and the parsed
+    dictionaries are left untouched.
+"""
+
+from typing import Any, Dict, Iterable, Union
+
+import pandas as pd
+
+import lac_covid19.const as const
+
+DATE = const.DATE
+
+# Each section and the columns of its table, after the date and group.
+GROUP_SECTIONS = {
+    const.CASES_BY_AGE: (const.AGE_GROUP, const.CASES),
+    const.CASES_BY_GENDER: (const.GENDER, const.CASES),
+    const.CASES_BY_RACE: (const.RACE, const.CASES),
+    const.DEATHS_BY_RACE: (const.RACE, const.DEATHS),
+}
+AGGREGATE_COLUMNS = (const.NEW_CASES, const.NEW_DEATHS,
+                     const.HOSPITALIZATIONS)
+HEALTH_DEPT_COLUMNS = (const.HEALTH_DPET, const.CASES, const.DEATHS)
+AREA_COLUMNS = (const.AREA, const.CASES, const.CASES_PER_CAPITA,
+                const.CF_OUTBREAK)
+
+SECTIONS = (const.AGGREGATE, const.HEALTH_DPET, *GROUP_SECTIONS, const.AREA)
+GROUP_COLUMN = {
+    const.AGGREGATE: None,
+    const.HEALTH_DPET: const.HEALTH_DPET,
+    const.AREA: const.AREA,
+    **{x: GROUP_SECTIONS[x][0] for x in GROUP_SECTIONS},
+}
+
+Tables = Dict[str, pd.DataFrame]
+
+
+def is_tables(many_daily_pr) -> bool:
+    """Press releases are given either as parsed dictionaries or as section
+        tables.
+    """
+    return isinstance(many_daily_pr, dict)
+
+
+def sort_tables(tables: Tables) -> Tables:
+    """Sorts each section table by date and group."""
+    for section, df in tables.items():
+        sort_by = [x for x in (DATE, GROUP_COLUMN[section]) if x in df]
+        tables[section] = df.sort_values(sort_by).reset_index(drop=True)
+    return tables
+
+
+def tabulate(many_daily_pr: Iterable[Dict[str, Any]]) -> Tables:
+    """Converts parsed press releases into a long table for each section. Only
+        values reported in a press release have a row.
+    Returns:
+        A dictionary of section to DataFrame sorted by date and group.
+    """
+    many_daily_pr = list(many_daily_pr)
+    dates = pd.to_datetime([x[DATE] for x in many_daily_pr])
+    tables = {
+        const.AGGREGATE: pd.DataFrame({
+            DATE: dates,
+            **{x: [pr[x] for pr in many_daily_pr] for x in AGGREGATE_COLUMNS},
+        }),
+        const.HEALTH_DPET: pd.DataFrame(
+            [(date, hd, pr[const.CASES].get(hd), pr[const.DEATHS].get(hd))
+             for date, pr in zip(dates, many_daily_pr)
+             for hd in {**pr[const.CASES], **pr[const.DEATHS]}],
+            columns=(DATE, *HEALTH_DEPT_COLUMNS)
+        ),
+        const.AREA: pd.DataFrame(
+            [(date, *row) for date, pr in zip(dates, many_daily_pr)
+             for row in pr[const.AREA]],
+            columns=(DATE, *AREA_COLUMNS)
+        ),
+    }
+    for section, columns in GROUP_SECTIONS.items():
+        tables[section] = pd.DataFrame(
+            [(date, group, count) for date, pr in zip(dates, many_daily_pr)
+             for group, count in pr[section].items()],
+            columns=(DATE, *columns)
+        )
+    return sort_tables(tables)
+
+
+def tables(many_daily_pr: Union[Tables, Iterable[Dict[str, Any]]]) -> Tables:
+    """The section tables of press releases given either way, such as the
+        generator access.iter_press_releases() or store.load().
+    """
+    if is_tables(many_daily_pr):
+        return many_daily_pr
+    return tabulate(many_daily_pr)
@@ -4,7 +4,8 @@
 
 import datetime as dt
 import re
-from typing import Any, Dict, Tuple, Optional, Union
+from typing import (Any, Dict, Iterable, List, Match, Optional, Pattern,
+                    Tuple, Union)
 
 import lac_covid19.const as const
 import lac_covid19.daily_pr.bad_data as bad_data
@@ -25,34 +26,96 @@ RE_NEW_DEATHS_CASES_AUTO = re.compile(
     'Daily\s+(new\s+)?cases:\s+(?P<cases>[\d,]+)\*?\s+Daily\s+(new\s+)?deaths:\s+(?P<deaths>[\d,]+)'
 )
 
-RE_HD = re.compile(
-    'Los\s+Angeles\s+County.+?(?P<lac>[\d,]+).+'
-    'Long\s+Beach.+?(?P<lb>[\d,]+).+'
-    'Pasadena.+?(?P<pas>[\d,]+)'
+# Every pattern below reads a single line. Where a number follows a name
+#   after at least one other character, the characters in between are a class
+#   which excludes the number, so each character is only tried once rather
+#   than ".+?" retrying the number from every position to the end of the line.
+PATTERN_NUMBER_AFTER = '[^\n][^\d,\n]*(?P<number>[\d,]+)'
+RE_HD_LAC = re.compile('Los\s+Angeles\s+County' + PATTERN_NUMBER_AFTER)
+RE_HD_LONG_BEACH = re.compile('Long\s+Beach' + PATTERN_NUMBER_AFTER)
+RE_HD_PASADENA = re.compile('Pasadena' + PATTERN_NUMBER_AFTER)
+RE_HOSPITALIZATIONS = re.compile(
+    'Hospitalized\s+\(Ever\)[^\n][^\d\n]*(\d+)'
 )
-RE_HOSPITALIZATIONS = re.compile('Hospitalized\s+\(Ever\).+?(\d+)')
 
+# The count of a group is the first run of digits followed by whitespace,
+#   after at least one character. Runs followed by anything else are passed
+#   over whole.
+RE_COUNT = re.compile('[^\n](?:[^\d\n]|\d+(?=[^\d\s]))*(?P<count>\d+)\s')
 
 PATTERN_AGE_HEADER = 'Age\s+Group\s+\(Los\s+Angeles'
-RE_AGE_ENTRY = re.compile(
-    '(?P<group>\d+\s+to\s+\d+|over\s+\d{2,}).+?(?P<count>\d+)\s'
-)
+RE_AGE_GROUP = re.compile('(?<!\d)\d+\s+to\s+\d+|over\s+\d{2,}')
 
 PATTERN_GENDER = 'Gender\s+\(Los\s+Angeles'
-RE_GENDER_ENTRY = re.compile(
-    f"(?P<group>{'|'.join(const.GENDER_GROUP)}).+?(?P<count>\d+)\s"
-)
+RE_GENDER_GROUP = re.compile('|'.join(const.GENDER_GROUP))
 
 PATTERN_RACE_CASES = '(?<!Deaths\s)Race/Ethnicity\s+\(Los\s+Angeles'
 PATTERN_RACE_DEATHS = 'Deaths\s+Race/Ethnicity\s+\(Los\s+Angeles'
-RE_RACE_ENTRY = re.compile(
-    f"(?P<group>{'|'.join(const.RACE_GROUP)}).+?(?P<count>\d+)\s"
-)
+RE_RACE_GROUP = re.compile('|'.join(const.RACE_GROUP))
 
-CSA_ENTIRE = re.compile('City\s+of\s+Agoura\s+Hills.+?Under\s+Investigation')
+RE_UNDER = re.compile('Under')
+RE_UNDER_INVESTIGATION = re.compile('Under\s+Investigation')
+# Area names are at most MAX_CSA_NAME characters, so a name without cases
+#   after it is given up on rather than extended to the end of the line.
+MAX_CSA_NAME = 100
 RE_CSA_ENTRY = re.compile(
-    '(?P<csa>City\s+of.+?|Los\s+Angeles(?!,|\sCounty).*?|Unincorporated.+?)'
-    '(?P<cfoutbreak>\*?)\s+(?P<cases>\d+|--).+?(?P<case_rate>\d+|--)')
+    f'(?P<csa>City\s+of[^\n]{{1,{MAX_CSA_NAME}}}?'
+    f'|Los\s+Angeles(?!,|\sCounty)[^\n]{{0,{MAX_CSA_NAME}}}?'
+    f'|Unincorporated[^\n]{{1,{MAX_CSA_NAME}}}?)'
+    '(?P<cfoutbreak>\*?)\s+(?P<cases>\d+|--)'
+    '[^\n](?:[^\d\n-]|-(?!-))*(?P<case_rate>\d+|--)'
+)
+
+# The start of every section the parser reads. All of them are found in a
+#   single scan of the press release, after which each section's regular
+#   expression only searches its own slice of the text.
+ANCHOR_DATE = 'date'
+ANCHOR_NEW_NORMAL = 'new_normal'
+ANCHOR_NEW_AUTO = 'new_auto'
+ANCHOR_LAC = 'lac'
+ANCHOR_HOSPITALIZATIONS = 'hospitalizations'
+ANCHOR_AGE = 'age'
+ANCHOR_GENDER = 'gender'
+ANCHOR_RACE_CASES = 'race_cases'
+ANCHOR_RACE_DEATHS = 'race_deaths'
+ANCHOR_CSA = 'csa'
+SECTION_ANCHORS = {
+    ANCHOR_DATE: 'For\s+Immediate\s+Release:',
+    ANCHOR_NEW_NORMAL: 'new\s+deaths?\s+and',
+    ANCHOR_NEW_AUTO: 'Daily\s+(?:new\s+)?cases:',
+    ANCHOR_HOSPITALIZATIONS: 'Hospitalized\s+\(Ever\)',
+    ANCHOR_AGE: 'Age\s+Group\s+\(',
+    ANCHOR_GENDER: 'Gender\s+\(',
+    ANCHOR_RACE_CASES: 'Race/Ethnicity\s+\(',
+    ANCHOR_RACE_DEATHS: 'Deaths\s+Race/Ethnicity',
+    ANCHOR_CSA: 'City\s+of\s+Agoura\s+Hills',
+    ANCHOR_LAC: 'Los\s+Angeles\s+County',
+}
+RE_SECTION_ANCHORS = {
+    x: re.compile(SECTION_ANCHORS[x]) for x in SECTION_ANCHORS
+}
+# Every anchor begins with a literal word. A plain alternation of those words
+#   is scanned far faster than one of the anchors themselves, so the scan
+#   finds the words and each anchor is confirmed where its word is found.
+ANCHOR_WORDS = {
+    re.match('[\w/]+', SECTION_ANCHORS[x]).group(): x for x in SECTION_ANCHORS
+}
+RE_ANCHOR_WORDS = re.compile('|'.join(map(re.escape, ANCHOR_WORDS)))
+
+
+# The regular expressions of each listing's header and of the groups within
+#   the listing.
+GROUP_SECTIONS = {
+    ANCHOR_AGE: (re.compile(PATTERN_AGE_HEADER), RE_AGE_GROUP),
+    ANCHOR_GENDER: (re.compile(PATTERN_GENDER), RE_GENDER_GROUP),
+    ANCHOR_RACE_CASES: (re.compile(PATTERN_RACE_CASES), RE_RACE_GROUP),
+    ANCHOR_RACE_DEATHS: (re.compile(PATTERN_RACE_DEATHS), RE_RACE_GROUP),
+}
+HEALTH_DEPTS = (const.hd.LOS_ANGELES_COUNTY, const.hd.LONG_BEACH,
+                const.hd.PASADENA)
+
+# The position of every occurrence of each anchor
+Anchors = Dict[str, List[int]]
 
 
 def _str_to_int(number: str) -> int:
@@ -65,42 +128,115 @@ def _str_to_int(number: str) -> int:
         pass
 
 
-def _parse_date(pr_txt: str) -> dt.date:
+def locate_sections(pr_txt: str) -> Anchors:
+    """Scans the press release once for the start of every section.
+    Returns:
+        A dictionary of each anchor name to the positions it occurs at.
+    """
+    anchors = {x: [] for x in SECTION_ANCHORS}
+    for word in RE_ANCHOR_WORDS.finditer(pr_txt):
+        name = ANCHOR_WORDS[word.group()]
+        if RE_SECTION_ANCHORS[name].match(pr_txt, position := word.start()):
+            anchors[name].append(position)
+    return anchors
+
+
+def match_at_anchor(pr_txt: str, anchors: Anchors, name: str,
+                     regex: Pattern) -> Optional[Match]:
+    """Matches a regular expression starting at the first anchor where it
+        fits, which is the same match as searching the entire text.
+    """
+    for position in anchors[name]:
+        if (match := regex.match(pr_txt, position)):
+            return match
+    return None
+
+
+def _line_end(pr_txt: str, position: int) -> int:
+    """The position of the newline ending the line of a position, or the end
+        of the text on the last line.
+    """
+    line_end = pr_txt.find('\n', position)
+    return len(pr_txt) if line_end < 0 else line_end
+
+
+def _match_on_line(pr_txt: str, anchors: Anchors, name: str,
+                   regex: Pattern) -> Optional[Match]:
+    """Matches a regular expression which reads to the end of the line, such
+        as a name and the first number after it, starting at the first anchor
+        where it fits. Having failed from one anchor, it fails from every
+        later anchor on the same line, so those are skipped.
+    """
+    line_end = -1
+    for position in anchors[name]:
+        if position > line_end:
+            if (match := regex.match(pr_txt, position)):
+                return match
+            line_end = _line_end(pr_txt, position)
+    return None
+
+
+def _listing(pr_txt: str, anchors: Anchors, name: str,
+             header: Pattern) -> Optional[str]:
+    """The text of a listing, from its header to the first "Under
+        Investigation" which starts on the same line.
+    """
+    line_end = -1
+    for position in anchors[name]:
+        if position > line_end and (match := header.match(pr_txt, position)):
+            line_end = _line_end(pr_txt, match.end())
+            # "Under Investigation" starts on the line but may end on the next.
+            start = match.end() + 1
+            while (under := RE_UNDER.search(pr_txt, start, line_end)):
+                if (under := RE_UNDER_INVESTIGATION.match(pr_txt,
+                                                          under.start())):
+                    return pr_txt[position:under.end()]
+                start += 1
+    return None
+
+
+def _parse_date(pr_txt: str, anchors: Optional[Anchors] = None) -> dt.date:
     """Finds the date from the HTML press release. This makes an assumption
     the first date in the press release is the date of release."""
-    return dt.datetime.strptime(RE_PR_DATE.search(pr_txt).group(1),
-                                '%B %d, %Y').date()
+    anchors = anchors or locate_sections(pr_txt)
+    return dt.datetime.strptime(
+        match_at_anchor(pr_txt, anchors, ANCHOR_DATE, RE_PR_DATE).group(1),
+        '%B %d, %Y'
+    ).date()
 
 
-def _parse_group(pr_txt: str, header_pattern: str,
-                 entry_regex: re.Pattern) -> Dict[str, int]:
+def _parse_group(listing: Optional[str],
+                 group_regex: Pattern) -> Dict[str, int]:
     """General function to parse and extract a listing from the press release.
     Args:
-        pr_txt: The text of the press release.
-        header_pattern: A string representing a regex pattern uniquely
-            identifying the top of the section.
-        entry_regex: A regular expression to match all the groups in the
-            section. This is expected to have a match group entitled "group"
-            identifying the subset of the population and "count" to identify
-            the tally identified with the group.
+        listing: The text of the section, or None if it is not in the press
+            release.
+        group_regex: A regular expression matching the subsets of the
+            population in the section. Each is followed by its count, as
+            matched by RE_COUNT.
     Returns:
         A dictionary with keys being the groups in section and values being
         their associated counts.
     """
     output = {}
-    listing = re.search(f'{header_pattern}.+?Under\s+Investigation', pr_txt)
-    if listing:
-        for row in entry_regex.finditer(listing.group()):
-            output[row.group('group')] = int(row.group('count'))
+    position = 0
+    while listing and (group := group_regex.search(listing, position)):
+        if not (row := RE_COUNT.match(listing, group.end())):
+            break  # No group after it is followed by a count either
+        output[group.group()] = int(row.group('count'))
+        position = row.end()
     return output
 
 
 def _parse_csa(
-    pr_txt: str
+    pr_txt: str, date: Optional[dt.date] = None,
+    anchors: Optional[Anchors] = None
 ) -> Dict[str, Tuple[Optional[int], Optional[int], Optional[bool]]]:
     """Parses the city/community section of the press release.
     Args:
         pr_txt: A string of the press release contents.
+        date: The date of the press release, if already known.
+        anchors: The section locations, if already known.
     Returns:
         A dictionary with keys representing the statistical area in question.
         The values are represted in the following tuple.
@@ -108,11 +244,12 @@ def _parse_csa(
             1 - Cumulative case rate
             2 - Indicates if there is a correctional facility outbreak.
     """
+    anchors = anchors or locate_sections(pr_txt)
+    date = date or _parse_date(pr_txt, anchors)
     output = []
-    cf_recorded = _parse_date(pr_txt) >= bad_data.CORR_FACILITY_RECORDED
-    search_txt = pr_txt
-    if (csa_txt := CSA_ENTIRE.search(pr_txt)):
-        search_txt = csa_txt.group()
+    cf_recorded = date >= bad_data.CORR_FACILITY_RECORDED
+    search_txt = _listing(pr_txt, anchors, ANCHOR_CSA, RE_SECTION_ANCHORS[
+        ANCHOR_CSA]) or pr_txt
     for row in RE_CSA_ENTRY.finditer(search_txt):
         output.append((
             row.group('csa').rstrip('*'),  # Remove excessive asterisks
@@ -123,14 +260,45 @@ def _parse_csa(
     return output
 
 
-def _get_new_cases_deaths(pr_txt: str) -> Tuple[int, int]:
+def _is_deaths_char(char: str, numeric: bool) -> bool:
+    """Tests if a character belongs to the word or number before "new
+        deaths", as matched by RE_NEW_DEATHS_CASES_NORMAL.
+    """
+    if numeric:
+        return char == ',' or char.isdecimal()
+    return 'a' <= char <= 'z'
+
+
+def _search_new_normal(pr_txt: str, anchors: Anchors) -> Optional[Match]:
+    """Finds RE_NEW_DEATHS_CASES_NORMAL by stepping back from each "new deaths
+        and ... new cases" anchor over the whitespace and the death count
+        which precede it.
+    """
+    for position in anchors[ANCHOR_NEW_NORMAL]:
+        start = position
+        while start > 0 and pr_txt[start - 1].isspace():
+            start -= 1
+        if start == position or start == 0:
+            continue
+        numeric = _is_deaths_char(pr_txt[start - 1], True)
+        while start > 0 and _is_deaths_char(pr_txt[start - 1], numeric):
+            start -= 1
+        if (match := RE_NEW_DEATHS_CASES_NORMAL.match(pr_txt, start)):
+            return match
+    return None
+
+
+def _get_new_cases_deaths(pr_txt: str, date: Optional[dt.date] = None,
+                          anchors: Optional[Anchors] = None
+                          ) -> Tuple[int, int]:
     """Extracts the daily new deaths and cases."""
-    if ((date := _parse_date(pr_txt).isoformat())
-        in bad_data.HARDCODE_NEW_CASES_DEATHS.keys()):
+    anchors = anchors or locate_sections(pr_txt)
+    date = (date or _parse_date(pr_txt, anchors)).isoformat()
+    if date in bad_data.HARDCODE_NEW_CASES_DEATHS.keys():
         return bad_data.HARDCODE_NEW_CASES_DEATHS[date]
 
     deaths, cases = None, None
-    result = RE_NEW_DEATHS_CASES_NORMAL.search(pr_txt)
+    result = _search_new_normal(pr_txt, anchors)
     if result:
         deaths = result.group('deaths')
         if deaths in NUMBERS_AS_WORDS.keys():
@@ -139,67 +307,139 @@ def _get_new_cases_deaths(pr_txt: str) -> Tuple[int, int]:
             deaths = _str_to_int(deaths)
         cases = _str_to_int(result.group('cases'))
     else:
-        result = RE_NEW_DEATHS_CASES_AUTO.search(pr_txt)
+        result = match_at_anchor(pr_txt, anchors, ANCHOR_NEW_AUTO,
+                                  RE_NEW_DEATHS_CASES_AUTO)
         cases = _str_to_int(result.group('cases'))
         deaths = _str_to_int(result.group('deaths'))
     return cases, deaths
 
 
-def _parse_hd_cases_deaths(pr_txt: str) -> Dict[str, Dict[str, int]]:
-    cases_find, deaths_find = [x for x in RE_HD.finditer(pr_txt)]
+def _match_hd(pr_txt: str,
+              position: int) -> Optional[Tuple[int, List[str]]]:
+    """Matches the Los Angeles County number at a "Los Angeles County" and
+        the first Long Beach and Pasadena numbers after it on the same line.
+    Returns:
+        The end of the match and the three numbers.
+    """
+    if not (match := RE_HD_LAC.match(pr_txt, position)):
+        return None
+    line_end = _line_end(pr_txt, match.end())
+    numbers = [match.group('number')]
+    for regex in (RE_HD_LONG_BEACH, RE_HD_PASADENA):
+        # At least one character separates a number from the next name.
+        if not (match := regex.search(pr_txt, match.end() + 1, line_end)):
+            return None
+        numbers.append(match.group('number'))
+    return match.end(), numbers
+
+
+def _parse_hd_cases_deaths(
+        pr_txt: str, anchors: Optional[Anchors] = None
+) -> Dict[str, Dict[str, int]]:
+    anchors = anchors or locate_sections(pr_txt)
+    # Every match begins at a "Los Angeles County". Having failed from one,
+    #   a match fails from every later one on the same line.
+    found, end = [], 0
+    for position in anchors[ANCHOR_LAC]:
+        if position >= end:
+            if (match := _match_hd(pr_txt, position)):
+                found.append(match[1])
+                end = match[0]
+            else:
+                end = _line_end(pr_txt, position)
+    cases_find, deaths_find = found
     return {
-        const.CASES: {
-            const.hd.LOS_ANGELES_COUNTY: _str_to_int(cases_find.group('lac')),
-            const.hd.LONG_BEACH: _str_to_int(cases_find.group('lb')),
-            const.hd.PASADENA: _str_to_int(cases_find.group('pas')),
-        },
-        const.DEATHS: {
-            const.hd.LOS_ANGELES_COUNTY: _str_to_int(deaths_find.group('lac')),
-            const.hd.LONG_BEACH: _str_to_int(deaths_find.group('lb')),
-            const.hd.PASADENA: _str_to_int(deaths_find.group('pas')),
-        },
+        const.CASES: dict(zip(HEALTH_DEPTS, map(_str_to_int, cases_find))),
+        const.DEATHS: dict(zip(HEALTH_DEPTS, map(_str_to_int, deaths_find))),
     }
 
 
-def _parse_hospitalizations(pr_txt: str) -> int:
-    return _str_to_int(RE_HOSPITALIZATIONS.search(pr_txt).group(1))
+def _parse_hospitalizations(pr_txt: str,
+                            anchors: Optional[Anchors] = None) -> int:
+    anchors = anchors or locate_sections(pr_txt)
+    return _str_to_int(_match_on_line(pr_txt, anchors,
+                                      ANCHOR_HOSPITALIZATIONS,
+                                      RE_HOSPITALIZATIONS).group(1))
+
 
+def _parse_section(pr_txt: str, anchors: Optional[Anchors],
+                   name: str) -> Dict[str, int]:
+    anchors = anchors or locate_sections(pr_txt)
+    header, group_regex = GROUP_SECTIONS[name]
+    return _parse_group(_listing(pr_txt, anchors, name, header), group_regex)
 
-def _parse_age_cases(pr_txt):
-    return _parse_group(pr_txt, PATTERN_AGE_HEADER, RE_AGE_ENTRY)
 
+def _parse_age_cases(pr_txt, anchors=None):
+    return _parse_section(pr_txt, anchors, ANCHOR_AGE)
 
-def _parse_gender(pr_txt):
-    return _parse_group(pr_txt, PATTERN_GENDER, RE_GENDER_ENTRY)
 
+def _parse_gender(pr_txt, anchors=None):
+    return _parse_section(pr_txt, anchors, ANCHOR_GENDER)
 
-def _parse_race_cases(pr_txt):
-    return _parse_group(pr_txt, PATTERN_RACE_CASES, RE_RACE_ENTRY)
 
+def _parse_race_cases(pr_txt, anchors=None):
+    return _parse_section(pr_txt, anchors, ANCHOR_RACE_CASES)
 
-def _parse_race_deaths(pr_txt):
-    return _parse_group(pr_txt, PATTERN_RACE_DEATHS, RE_RACE_ENTRY)
 
+def _parse_race_deaths(pr_txt, anchors=None):
+    return _parse_section(pr_txt, anchors, ANCHOR_RACE_DEATHS)
 
-def parse_pr(pr_txt: str) -> Dict[str, Union[dt.date, int, Dict[str, Any]]]:
+
+# Each key of a parsed press release and the parser producing it, called with
+# the text, its anchors and its date.
+PARSERS = {
+    const.NEW_CASES: lambda txt, anchors, date: (
+        _get_new_cases_deaths(txt, date, anchors)[0]),
+    const.NEW_DEATHS: lambda txt, anchors, date: (
+        _get_new_cases_deaths(txt, date, anchors)[1]),
+    const.HOSPITALIZATIONS: lambda txt, anchors, date: (
+        _parse_hospitalizations(txt, anchors)),
+    const.CASES: lambda txt, anchors, date: (
+        _parse_hd_cases_deaths(txt, anchors)[const.CASES]),
+    const.DEATHS: lambda txt, anchors, date: (
+        _parse_hd_cases_deaths(txt, anchors)[const.DEATHS]),
+    const.CASES_BY_AGE: lambda txt, anchors, date: (
+        _parse_age_cases(txt, anchors)),
+    const.CASES_BY_GENDER: lambda txt, anchors, date: (
+        _parse_gender(txt, anchors)),
+    const.CASES_BY_RACE: lambda txt, anchors, date: (
+        _parse_race_cases(txt, anchors)),
+    const.DEATHS_BY_RACE: lambda txt, anchors, date: (
+        _parse_race_deaths(txt, anchors)),
+    const.AREA: lambda txt, anchors, date: _parse_csa(txt, date, anchors),
+}
+
+
+def parse_pr(pr_txt: str, keys: Optional[Iterable[str]] = None
+             ) -> Dict[str, Union[dt.date, int, Dict[str, Any]]]:
     """Parses each section of the daily COVID-19 report and places everything
         in a single object.
+    Args:
+        pr_txt: The text of the press release.
+        keys: Only parses these keys of PARSERS, such as when a single
+            section's cache is out of date. The date is always parsed.
     """
 
-    new_cases, new_deaths = _get_new_cases_deaths(pr_txt)
-    hd_cases_deaths = _parse_hd_cases_deaths(pr_txt)
+    anchors = locate_sections(pr_txt)
+    date = _parse_date(pr_txt, anchors)
+    if keys is not None:
+        return {const.DATE: date,
+                **{x: PARSERS[x](pr_txt, anchors, date)
+                   for x in PARSERS if x in keys}}
+    new_cases, new_deaths = _get_new_cases_deaths(pr_txt, date, anchors)
+    hd_cases_deaths = _parse_hd_cases_deaths(pr_txt, anchors)
     return {
-        const.DATE: _parse_date(pr_txt),
+        const.DATE: date,
         const.NEW_CASES: new_cases,
         const.NEW_DEATHS: new_deaths,
-        const.HOSPITALIZATIONS: _parse_hospitalizations(pr_txt),
+        const.HOSPITALIZATIONS: _parse_hospitalizations(pr_txt, anchors),
         const.CASES: hd_cases_deaths[const.CASES],
         const.DEATHS: hd_cases_deaths[const.DEATHS],
-        const.CASES_BY_AGE: _parse_age_cases(pr_txt),
-        const.CASES_BY_GENDER: _parse_gender(pr_txt),
-        const.CASES_BY_RACE: _parse_race_cases(pr_txt),
-        const.DEATHS_BY_RACE: _parse_race_deaths(pr_txt),
-        const.AREA: _parse_csa(pr_txt)
+        const.CASES_BY_AGE: _parse_age_cases(pr_txt, anchors),
+        const.CASES_BY_GENDER: _parse_gender(pr_txt, anchors),
+        const.CASES_BY_RACE: _parse_race_cases(pr_txt, anchors),
+        const.DEATHS_BY_RACE: _parse_race_deaths(pr_txt, anchors),
+        const.AREA: _parse_csa(pr_txt, date, anchors)
     }
 
 
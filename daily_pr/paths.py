@@ -1,6 +1,13 @@
 import os.path
 
-DIR_HTML, DIR_JSON, DIR_PICKLE = [
+DIR_HTML, DIR_JSON, DIR_PICKLE, DIR_PARQUET, DIR_TS_CACHE = [
     os.path.join(os.path.dirname(__file__), x)
-    for x in ('cached-html', 'parsed-json', 'pickle-cache')
+    for x in ('cached-html', 'parsed-json', 'pickle-cache', 'parsed-parquet',
+              'time-series-cache')
 ]
+
+HTML_ARCHIVE, HTML_INDEX = [
+    os.path.join(DIR_HTML, x) for x in ('releases.archive', 'releases.json')
+]
+
+PRID_INDEX = os.path.join(os.path.dirname(__file__), 'prid.json')
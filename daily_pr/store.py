@@ -0,0 +1,189 @@
+"""Stores parsed press releases as columnar Parquet tables, one table for each
+    section of the press release. Tables are written incrementally as a
+    directory of part files, so adding a day only writes that day's rows, and
+    can be read back directly as DataFrames by pandas or any Arrow reader.
+"""
+
+import json
+import os
+import os.path
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import pandas as pd
+
+import lac_covid19.const as const
+import lac_covid19.daily_pr.fingerprint as fingerprint
+from lac_covid19.daily_pr.ingest import SECTIONS, sort_tables, tabulate
+from lac_covid19.daily_pr.paths import DIR_PARQUET
+
+DATE = const.DATE
+FINGERPRINTS = os.path.join(DIR_PARQUET, 'fingerprints.json')
+
+
+def _section_dir(section: str) -> str:
+    return os.path.join(
+        DIR_PARQUET, section.lower().replace('/', '-').replace(' ', '-')
+    )
+
+
+def stored_dates() -> pd.DatetimeIndex:
+    """The dates of every press release in the store."""
+    if not os.path.isdir(_section_dir(const.AGGREGATE)):
+        return pd.DatetimeIndex([])
+    return pd.DatetimeIndex(
+        pd.read_parquet(_section_dir(const.AGGREGATE), columns=[DATE])[DATE]
+    )
+
+
+def _load_fingerprints() -> Dict[str, str]:
+    if not os.path.isfile(FINGERPRINTS):
+        return {}
+    with open(FINGERPRINTS) as f:
+        return json.load(f)
+
+
+def _write_fingerprints(fingerprints: Dict[str, str]) -> None:
+    tmp_path = f'{FINGERPRINTS}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(fingerprints, f, separators=const.JSON_COMPACT,
+                  sort_keys=True)
+    os.replace(tmp_path, FINGERPRINTS)
+
+
+def _stale_dates() -> List[str]:
+    """The stored press releases parsed by an earlier parser or corrections,
+        as dates formated in ISO.
+    """
+    fingerprints = _load_fingerprints()
+    return [x for x in (y.isoformat() for y in stored_dates().date)
+            if fingerprints.get(x) != fingerprint.release_digest(x)]
+
+
+def is_current() -> bool:
+    """Whether every stored press release was parsed by the current parser
+        and corrections.
+    """
+    return not _stale_dates()
+
+
+def _part_name(dates: pd.Series) -> str:
+    """A name for a part file of the dates not used by any stored part."""
+    name = base = f'{dates.min():%Y-%m-%d}_{dates.max():%Y-%m-%d}'
+    aggregate_dir = _section_dir(const.AGGREGATE)
+    parts = set(os.listdir(aggregate_dir) if os.path.isdir(aggregate_dir)
+                else ())
+    suffix = 1
+    while f'{name}.parquet' in parts:
+        suffix += 1
+        name = f'{base}_{suffix}'
+    return name
+
+
+def _write_part(section: str, df: pd.DataFrame, name: str) -> str:
+    """Writes a part file under a hidden name, which readers ignore, and
+        returns the name it should be renamed to.
+    """
+    os.makedirs(section_dir := _section_dir(section), exist_ok=True)
+    df.to_parquet(os.path.join(section_dir, f'.{name}.parquet'), index=False)
+    return f'{name}.parquet'
+
+
+def _publish_part(section: str, name: str) -> None:
+    section_dir = _section_dir(section)
+    os.replace(os.path.join(section_dir, f'.{name}'),
+               os.path.join(section_dir, name))
+
+
+def _remove(dates: Sequence[str]) -> None:
+    """Rewrites the part files holding any of the press releases without
+        them. Every other part file is left untouched.
+    """
+    dates = pd.to_datetime(list(dates))
+    aggregate_dir = _section_dir(const.AGGREGATE)
+    parts = []
+    for x in sorted(os.listdir(aggregate_dir)):
+        if not x.startswith('.') and pd.read_parquet(
+                os.path.join(aggregate_dir, x),
+                columns=[DATE])[DATE].isin(dates).any():
+            parts.append(x)
+    # The aggregate table marks dates as stored, so it is rewritten first.
+    for section in SECTIONS:
+        for part in parts:
+            path = os.path.join(_section_dir(section), part)
+            if not os.path.isfile(path):
+                continue
+            df = pd.read_parquet(path)
+            if (kept := df[~df[DATE].isin(dates)]).empty:
+                os.remove(path)
+            else:
+                _publish_part(section, _write_part(section, kept, part[:-8]))
+
+
+def write(many_daily_pr: Iterable[Dict[str, Any]],
+          rebuild: bool = False) -> int:
+    """Adds press releases missing from the store as new part files. Stored
+        press releases out of date with the parser or corrections are written
+        again, after rewriting only the part files which held them.
+    Args:
+        many_daily_pr: Parsed press releases.
+        rebuild: Discards the stored tables and writes every press release.
+    Returns:
+        The number of press releases written.
+    """
+    if rebuild:
+        for section in SECTIONS:
+            if os.path.isdir(section_dir := _section_dir(section)):
+                for x in os.listdir(section_dir):
+                    os.remove(os.path.join(section_dir, x))
+                os.rmdir(section_dir)
+        _write_fingerprints({})
+    elif (stale := _stale_dates()):
+        _remove(stale)
+    stored = set(stored_dates().date)
+    new_pr = [x for x in many_daily_pr if x[DATE] not in stored]
+    if not new_pr:
+        return 0
+    tables = tabulate(new_pr)
+    name = _part_name(tables[const.AGGREGATE][DATE])
+    # The aggregate table marks dates as stored, so it is published last.
+    for section in SECTIONS[::-1]:
+        _publish_part(section, _write_part(section, tables[section], name))
+    fingerprints = _load_fingerprints()
+    fingerprints.update({x: fingerprint.release_digest(x)
+                         for x in (pr[DATE].isoformat() for pr in new_pr)})
+    _write_fingerprints(fingerprints)
+    return len(new_pr)
+
+
+def load(sections: Optional[Sequence[str]] = None,
+         columns: Optional[Dict[str, Sequence[str]]] = None,
+         start: Optional[pd.Timestamp] = None) -> Dict[str, pd.DataFrame]:
+    """Reads section tables from the store.
+    Args:
+        sections: The sections to read. Defaults to every section.
+        columns: An optional mapping of section to the columns to read.
+        start: Only reads the press releases from this date onward, skipping
+            part files of earlier dates.
+    Returns:
+        A dictionary of section to DataFrame sorted by date.
+    """
+    columns = columns or {}
+    filters = None if start is None else [(DATE, '>=', pd.Timestamp(start))]
+    return sort_tables({
+        x: pd.read_parquet(_section_dir(x), columns=columns.get(x),
+                           filters=filters)
+        for x in (SECTIONS if sections is None else sections)
+    })
+
+
+def compact() -> None:
+    """Rewrites each section as a single part file."""
+    tables = load()
+    dates = tables[const.AGGREGATE][DATE]
+    name = f'{dates.min():%Y-%m-%d}_{dates.max():%Y-%m-%d}'
+    for section in SECTIONS[::-1]:
+        parts = os.listdir(section_dir := _section_dir(section))
+        compacted = _write_part(section, tables[section], name)
+        for x in parts:
+            os.remove(os.path.join(section_dir, x))
+        _publish_part(section, compacted)
@@ -2,12 +2,20 @@
     dataframes.
 """
 
+from concurrent.futures import (FIRST_COMPLETED, ProcessPoolExecutor,
+                                as_completed, wait)
+from collections.abc import Mapping
+import hashlib
+import json
 import os.path
-import pickle
-from typing import Any, Dict, Iterable, Optional, Sequence, Tuple, Union
+import threading
+import time
+import tracemalloc
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
 
 import numpy as np
 import pandas as pd
+import pyarrow.feather as feather
 
 import covid_tools.calc
 
@@ -15,9 +23,13 @@ import lac_covid19.const as const
 from lac_covid19.daily_pr.bad_data import (NO_REPORT_DATES,
                                            CORR_FACILITY_RECORDED)
 import lac_covid19.daily_pr.access as access
+from lac_covid19.daily_pr.area_matrix import SUM, AreaMatrix, per_capita
+import lac_covid19.daily_pr.fingerprint as fingerprint
+import lac_covid19.daily_pr.ingest as ingest
+import lac_covid19.daily_pr.store as store
 import lac_covid19.population as population
-from lac_covid19.geo.csa import CSA_REGION_MAP
-from lac_covid19.daily_pr.paths import DIR_PICKLE
+import lac_covid19.geo.areas as area_registry
+from lac_covid19.daily_pr.paths import DIR_TS_CACHE
 from lac_covid19.daily_pr.bad_data import BAD_DATE_AREA
 
 DATE = const.DATE
@@ -35,21 +47,24 @@ CF_OUTBREAK = const.CF_OUTBREAK
 
 INT64 = 'Int64'
 
-TS_CACHE = os.path.join(DIR_PICKLE, 'time-series.pickle')
-
-
-def make_section_ts(daily_pr: Dict, section: str) -> Dict[str, Any]:
-    """Extracts a section and appends the corersponding date."""
-    data = daily_pr[section]
-    data[DATE] = pd.to_datetime(daily_pr[DATE])
-    return data
-
-
-def make_ts_general(many_daily_pr, dict_key, var_name, value_name):
+# A Feather file for each table, and a manifest of the fingerprint of the
+# inputs and code of each table and the hash of its file.
+TS_CACHE = DIR_TS_CACHE
+TS_MANIFEST = os.path.join(TS_CACHE, 'manifest.json')
+_manifest_lock = threading.Lock()
+
+
+def make_ts_general(tables: ingest.Tables, section: str, var_name: str,
+                    value_name: str) -> pd.DataFrame:
+    """A group section with a row for every group on every date."""
+    # Pivoting restores the groups missing from a press release, as values
+    # which are not reported.
+    df = (tables[section]
+          .pivot(index=DATE, columns=var_name, values=value_name)
+          .rename_axis(columns=None).reset_index())
     return pd.melt(
-        pd.DataFrame([make_section_ts(x, dict_key) for x in many_daily_pr]),
-        id_vars=DATE, var_name=var_name, value_name=value_name
-    ).sort_values([DATE, var_name]).reset_index(drop=True)
+        df, id_vars=DATE, var_name=var_name, value_name=value_name
+    ).sort_values([DATE, var_name], ignore_index=True)
 
 
 AGE_SORT_MAP = {
@@ -73,87 +88,127 @@ NEW_GROUPS = (const.AGE_0_4, const.AGE_5_11, const.AGE_12_17, const.AGE_18_29,
               const.AGE_OVER_80)
 AGE_TRANSITION = pd.to_datetime('2020-07-24')
 
-def create_by_age(many_daily_pr: Tuple[Dict[str, Any], ...]) -> pd.DataFrame:
+# The columns of a variable's daily change, the change's 14 day average, the
+# variable per capita and the average per capita. Changes and averages which
+# are not named are left out.
+CASE_COLUMNS = (None, None, const.CASES_PER_CAPITA,
+                const.NEW_CASES_14_DAY_AVG_PER_CAPITA)
+DEATH_COLUMNS = (None, None, const.DEATHS_PER_CAPITA,
+                 const.NEW_DEATHS_14_DAY_AVG_PER_CAPITA)
+REGION_COLUMNS = (const.NEW_CASES, const.NEW_CASES_14_DAY_AVG,
+                  const.CASES_PER_CAPITA,
+                  const.NEW_CASES_14_DAY_AVG_PER_CAPITA)
+
+
+def _group_stats(groups: AreaMatrix, variable: str, group_pop: np.ndarray,
+                 columns: Tuple[Optional[str], Optional[str], str, str],
+                 group_col: str) -> pd.DataFrame:
+    """A variable of groups, its daily change and the change's 14 day
+        average, and both per capita, as covid_tools.calc.compute_all_groups()
+        computed them. Each group has a row for every day from its first
+        report to its last, and the averages and rates are rounded as they
+        are published.
+    Args:
+        groups: The groups as the columns of a matrix.
+        variable: The column of the matrix to compute from.
+        group_pop: The population of each group, NaN if it is not known.
+        columns: The names of the columns computed, as CASE_COLUMNS.
+        group_col: The name of the group column.
+    Returns:
+        A long table sorted by date and then in the order of the groups.
+    """
+    groups = groups.ffill_missing()
+    values = groups.values[variable]
+    change = groups.diff(values)
+    change_avg = groups.rolling_mean(change, 14)
+    change_col, change_avg_col, per_capita_col, change_avg_per_capita_col = (
+        columns)
+    output = {variable: values}
+    if change_col:
+        output[change_col] = change
+    if change_avg_col:
+        output[change_avg_col] = change_avg.round(1)
+    output[per_capita_col] = per_capita(values, group_pop).round(1)
+    output[change_avg_per_capita_col] = (
+        per_capita(change_avg, group_pop).round(2)
+    )
+    return groups.to_long(output, group_col)
+
+
+def _group_ts(tables: ingest.Tables, section: str, group_col: str,
+              variable: str, columns: Tuple[Optional[str], Optional[str],
+                                            str, str],
+              group_pop: Dict[str, int],
+              exclude_groups: Iterable[str] = ()) -> pd.DataFrame:
+    """The time series of a group section, computed by _group_stats().
+    Args:
+        tables: The section tables of the press releases.
+        section: The section of the groups.
+        group_col: The group column of the section.
+        variable: The value column of the section.
+        columns: The names of the columns computed, as CASE_COLUMNS.
+        group_pop: The population of each group.
+        exclude_groups: Groups which are left out.
+    """
+    df = make_ts_general(tables, section, group_col, variable)
+    df = df[~df[group_col].isin(exclude_groups)]
+    groups = AreaMatrix.from_long(df, (variable,), group_col)
+    return _group_stats(
+        groups, variable,
+        np.array([group_pop.get(x, np.nan) for x in groups.areas],
+                 dtype=float),
+        columns, group_col)
+
+
+def create_by_age(many_daily_pr: Iterable[Dict[str, Any]]) -> pd.DataFrame:
     """Time series of cases by age group.
 
     Returns:
         Time series DataFrame with the entries: Date, Age Group, Cases, Case
             Rate.
     """
-    df = covid_tools.calc.compute_all_groups(
-        make_ts_general(many_daily_pr, const.CASES_BY_AGE,
-                        const.AGE_GROUP, const.CASES),
-        DATE, const.CASES, const.AGE_GROUP,
-        var_norm_col=const.CASES_PER_CAPITA,
-        var_dt_norm_avg_col=const.NEW_CASES_14_DAY_AVG_PER_CAPITA,
-        population_mapper=population.AGE
-    )
+    df = _group_ts(ingest.tables(many_daily_pr), const.CASES_BY_AGE,
+                   const.AGE_GROUP, CASES, CASE_COLUMNS, population.AGE)
     df['age'] = df[const.AGE_GROUP].apply(AGE_SORT_MAP.get)
     df = df.sort_values([DATE, 'age']).drop(columns='age')
     df = df[
         (df[const.DATE]<AGE_TRANSITION)&(df[const.AGE_GROUP].isin(OLD_GROUPS))
         |(df[const.DATE]>=AGE_TRANSITION)&(df[const.AGE_GROUP].isin(NEW_GROUPS))
-    ].copy()
+    ]
     return df.reset_index(drop=True).convert_dtypes()
 
 
-def create_by_gender(many_daily_pr: Tuple[Dict[str, Any], ...]) -> pd.DataFrame:
+def create_by_gender(many_daily_pr: Iterable[Dict[str, Any]]) -> pd.DataFrame:
     """Time series of cases by gender.
 
     Returns:
         Time series DataFrame with the entries: Date, Gender, Cases, Case Rate.
     """
-    df = covid_tools.calc.compute_all_groups(
-        make_ts_general(many_daily_pr, const.CASES_BY_GENDER,
-                        const.GENDER, const.CASES),
-        DATE, const.CASES, const.GENDER,
-        var_norm_col=const.CASES_PER_CAPITA,
-        var_dt_norm_avg_col=const.NEW_CASES_14_DAY_AVG_PER_CAPITA,
-        population_mapper=population.GENDER, exclude_groups=[const.OTHER]
-    )
+    df = _group_ts(ingest.tables(many_daily_pr), const.CASES_BY_GENDER,
+                   const.GENDER, CASES, CASE_COLUMNS, population.GENDER,
+                   exclude_groups=[const.OTHER])
     return df.convert_dtypes()
 
 
-def create_by_race(many_daily_pr: Tuple[Dict[str, Any], ...]) -> pd.DataFrame:
+def create_by_race(many_daily_pr: Iterable[Dict[str, Any]]) -> pd.DataFrame:
     """Time series of cases and deaths by race.
 
     Returns:
         Time series DataFrame with the entries: Date, Race, Cases, Case Rate,
             Deaths, Death Rate.
     """
-
-    df_cases = covid_tools.calc.compute_all_groups(
-        make_ts_general(many_daily_pr, const.CASES_BY_RACE,
-                        const.RACE, const.CASES),
-        DATE, const.CASES, const.RACE,
-        var_norm_col=const.CASES_PER_CAPITA,
-        var_dt_norm_avg_col=const.NEW_CASES_14_DAY_AVG_PER_CAPITA,
-        population_mapper=population.RACE, exclude_groups=[const.OTHER]
-    )
-    df_deaths = covid_tools.calc.compute_all_groups(
-        make_ts_general(many_daily_pr, const.DEATHS_BY_RACE,
-                        const.RACE, const.DEATHS),
-        DATE, const.DEATHS, const.RACE,
-        var_norm_col=const.DEATHS_PER_CAPITA,
-        var_dt_norm_avg_col=const.NEW_DEATHS_14_DAY_AVG_PER_CAPITA,
-        population_mapper=population.RACE, exclude_groups=[const.OTHER]
-    )
+    tables = ingest.tables(many_daily_pr)
+
+    df_cases = _group_ts(tables, const.CASES_BY_RACE, const.RACE, CASES,
+                         CASE_COLUMNS, population.RACE,
+                         exclude_groups=[const.OTHER])
+    df_deaths = _group_ts(tables, const.DEATHS_BY_RACE, const.RACE, DEATHS,
+                          DEATH_COLUMNS, population.RACE,
+                          exclude_groups=[const.OTHER])
     df = pd.merge(df_cases, df_deaths, on=[DATE, const.RACE])
     return df.convert_dtypes()
 
 
-def single_day_area(daily_pr: Dict[str, Any]) -> pd.DataFrame:
-    """Converts the area case count from JSON to a DataFrame and assigns a
-        Los Angeles County region.
-    """
-
-    # Leverage the provided grouping of area, cases, and case rate.
-    df = pd.DataFrame(daily_pr[AREA],
-                      columns=(AREA, CASES, CASE_RATE, CF_OUTBREAK))
-    df[DATE] = pd.to_datetime(daily_pr[DATE])
-    return df[[DATE, AREA, CASES, CASE_RATE, CF_OUTBREAK]]
-
-
 def detect_active_areas(df_area, days_back=60, min_days=50):
     area_counts = df_area[
         df_area[const.DATE]
@@ -162,53 +217,75 @@ def detect_active_areas(df_area, days_back=60, min_days=50):
     return area_counts.loc[area_counts[0]>min_days, const.AREA].copy()
 
 
-def create_by_area(many_daily_pr: Tuple[Dict[str, Any], ...]) -> pd.DataFrame:
+def create_by_area(many_daily_pr: Iterable[Dict[str, Any]]) -> pd.DataFrame:
     """Time series of cases by area.
 
     Returns:
         Time series DataFrame with the entries: Date, Area, Region, Case Rate.
     """
-
-    df_csa = pd.concat(map(single_day_area, many_daily_pr), ignore_index=True)
-    df_csa = df_csa[df_csa[const.AREA].isin(detect_active_areas(df_csa))].copy()
-
-    df_hd = health_dept_ts(many_daily_pr, const.CASES)
-    df_hd = df_hd[df_hd[const.HEALTH_DPET]!=const.hd.LOS_ANGELES_COUNTY].copy()
-    df_hd = covid_tools.calc.normalize_population_groups(
-        df_hd, const.CASES, const.CASES_PER_CAPITA,
-        const.HEALTH_DPET, population.HEALTH_DEPT
+    tables = ingest.tables(many_daily_pr)
+
+    # The matrices are built from the columns of the section tables, rather
+    # than from copies of them, and leave out the rows without an area.
+    df_csa = tables[AREA]
+    csa_areas = area_registry.resolve(df_csa[AREA])
+    active = detect_active_areas(
+        pd.DataFrame({DATE: df_csa[DATE], AREA: csa_areas}))
+    csa_areas[~pd.Series(csa_areas).isin(active).to_numpy()] = None
+
+    df_hd = health_dept_ts(tables, const.CASES)
+    df_hd = df_hd[df_hd[const.HEALTH_DPET]!=const.hd.LOS_ANGELES_COUNTY]
+    hd_dates = df_hd[DATE].to_numpy()
+    hd_cases = df_hd[CASES].to_numpy(dtype=float, na_value=np.nan)
+    hd_case_rate = per_capita(
+        hd_cases,
+        df_hd[const.HEALTH_DPET].map(population.HEALTH_DEPT).to_numpy(float)
+    ).round(1)
+    hd_cf_outbreak = np.where(
+        hd_dates >= pd.Timestamp(CORR_FACILITY_RECORDED).to_datetime64(),
+        False, None
     )
-    df_hd[const.CASES_PER_CAPITA] = df_hd[const.CASES_PER_CAPITA].round(1)
-    df_hd.rename(columns={const.HEALTH_DPET: const.AREA}, inplace=True)
-    df_hd[const.AREA] = df_hd[const.AREA].apply(const.hd.HD_CSA_MAP.get)
-    df_hd[CF_OUTBREAK] = df_hd[DATE].apply(
-        lambda x: False if x >= CORR_FACILITY_RECORDED else None
-    )
-
-    df = (pd.concat([df_csa, df_hd])
-          .sort_values([DATE, AREA]).reset_index(drop=True))
 
-    # Calculate new cases rolling average
-    df = covid_tools.calc.rolling_avg_groups(
-        covid_tools.calc.daily_change_groups(
-            df, DATE, const.CASES, const.NEW_CASES, const.AREA
-        ), DATE, const.NEW_CASES, const.NEW_CASES_14_DAY_AVG, 14, const.AREA
-    )
-    # Calculate new cases per capita rolling average
-    df = covid_tools.calc.rolling_avg_groups(
-        covid_tools.calc.daily_change_groups(
-            df, DATE, const.CASES_PER_CAPITA, 'new cases per capita', const.AREA
-        ), DATE, 'new cases per capita',
-        const.NEW_CASES_14_DAY_AVG_PER_CAPITA, 14, const.AREA
-    )
-    df[const.NEW_CASES_14_DAY_AVG] = df[const.NEW_CASES_14_DAY_AVG].round(2)
-    df[const.NEW_CASES_14_DAY_AVG_PER_CAPITA] = (
-        df[const.NEW_CASES_14_DAY_AVG_PER_CAPITA].round(2)
-    )
-    df.drop(columns='new cases per capita', inplace=True)
+    # Long Beach and Pasadena are reported both as areas and as health
+    # departments. Both rows are kept, as they always were, and the areas and
+    # the health departments are pivoted apart so each row's changes and
+    # averages are taken over its own days.
+    df = pd.concat([
+        _area_stats(AreaMatrix.from_arrays(
+            df_csa[DATE].to_numpy(), csa_areas,
+            {x: df_csa[x] for x in (CASES, CASE_RATE, CF_OUTBREAK)}
+        )),
+        _area_stats(AreaMatrix.from_arrays(
+            hd_dates, area_registry.resolve(df_hd[const.HEALTH_DPET]),
+            {CASES: hd_cases, CASE_RATE: hd_case_rate,
+             CF_OUTBREAK: hd_cf_outbreak}
+        )),
+    ]).sort_values([DATE, AREA]).reset_index(drop=True)
+    df[AREA] = area_registry.categorical(df[AREA])
     return df.convert_dtypes()
 
 
+def _area_stats(matrix: AreaMatrix) -> pd.DataFrame:
+    """The cases, case rate, new cases and their averages of areas, as a long
+        table sorted by date and then area. Each area has a row for every day
+        from its first report to its last, as covid_tools fills groups with
+        ffill_missing, so days without a press release carry its cases.
+    """
+    matrix = matrix.ffill_missing()
+    new_cases = matrix.diff(matrix.values[CASES])
+    new_cases_per_capita = matrix.diff(matrix.values[CASE_RATE])
+    return matrix.to_long({
+        CASES: matrix.values[CASES],
+        CASE_RATE: matrix.values[CASE_RATE],
+        CF_OUTBREAK: matrix.values[CF_OUTBREAK],
+        const.NEW_CASES: new_cases,
+        const.NEW_CASES_14_DAY_AVG: matrix.rolling_mean(new_cases, 14).round(2),
+        const.NEW_CASES_14_DAY_AVG_PER_CAPITA: (
+            matrix.rolling_mean(new_cases_per_capita, 14).round(2)
+        ),
+    })
+
+
 SPA_NUMBERS = {
     const.SPA_AV: 1,
     const.SPA_SF: 2,
@@ -251,37 +328,33 @@ def create_by_region(
             dt[Cases], dt[Case Rate].
      """
 
-    df_all_loc = df_all_loc[[DATE, AREA, CASES]].copy()
-    df_all_loc[REGION] = df_all_loc[AREA].apply(CSA_REGION_MAP.get)
+    # An area reported both as an area and as a health department is counted
+    # once for each, as summing its rows always has.
+    matrix = AreaMatrix.from_long(df_all_loc, (CASES,), duplicates=SUM)
+    cases = matrix.values[CASES]
 
     # Correct erroneous area records by using previous dates
     if exclude_date_area is not None:
-        df_all_loc.loc[
-            df_all_loc.apply(
-                lambda x: ((x[DATE].isoformat()[:10], x[AREA])
-                           in exclude_date_area),
-                axis='columns'),
-            CASES
-        ] = pd.NA
-
-        # Isolate each area with bad data and forward fill cases
-        for area in [x[1] for x in exclude_date_area]:
-            area_cases = df_all_loc.loc[df_all_loc[AREA] == area, CASES]
-            area_cases = area_cases.fillna(method='pad')
-            # Put area cases back into wider area time series
-            df_all_loc.loc[area_cases.index, CASES] = area_cases
-
-    df_region = covid_tools.calc.compute_all_groups(
-        df_all_loc.groupby([DATE, REGION]).sum().reset_index(),
-        DATE, CASES, REGION, const.NEW_CASES,
-        const.NEW_CASES_14_DAY_AVG, const.CASES_PER_CAPITA,
-        const.NEW_CASES_14_DAY_AVG_PER_CAPITA, population.SPA
-    )
-
-    df_region['spa'] = df_region[REGION].apply(SPA_NUMBERS.get)
-    df_region = df_region.sort_values([DATE, 'spa']).reset_index(drop=True)
-    df_region.drop(columns='spa', inplace=True)
-    return df_region.convert_dtypes()
+        dates = matrix.dates.get_indexer(
+            pd.to_datetime([x[0] for x in exclude_date_area]))
+        areas = pd.Index(matrix.areas).get_indexer(
+            area_registry.resolve([x[1] for x in exclude_date_area]))
+        bad = (dates >= 0) & (areas >= 0)
+        cases[dates[bad], areas[bad]] = np.nan
+        # Forward fill cases of each area with bad data
+        cases = matrix.ffill(cases, np.isin(np.arange(len(matrix.areas)),
+                                            areas))
+        matrix.values[CASES] = cases
+
+    area_regions = area_registry.region(matrix.areas)
+    regions = matrix.group(area_regions, sorted(
+        {x for x in area_regions if x},
+        key=lambda x: (SPA_NUMBERS.get(x, len(SPA_NUMBERS)), x)
+    ))
+    region_pop = np.array([population.SPA.get(x, np.nan)
+                           for x in regions.areas], dtype=float)
+    return _group_stats(regions, CASES, region_pop, REGION_COLUMNS,
+                        REGION).convert_dtypes()
 
 
 def create_custom_region(df_area: pd.DataFrame,
@@ -302,31 +375,72 @@ def create_custom_region(df_area: pd.DataFrame,
             returned time series.
     """
 
-    region_pop = 0
-    for area in areas:
-        region_pop += population.CSA[area]
+    region_pop = area_registry.population(areas).sum()
 
     # Keep only areas from parameter
     df_custom_region = (
         df_area.loc[df_area[AREA].isin(areas), [DATE, CASES]]
         .groupby(DATE).sum().reset_index()
     )
+    df_custom_region[REGION] = REGION
 
-    return covid_tools.calc.compute_all(
-        df_custom_region, DATE, CASES, const.NEW_CASES,
-        const.NEW_CASES_14_DAY_AVG, const.CASES_PER_CAPITA,
-        const.NEW_CASES_14_DAY_AVG_PER_CAPITA, region_pop
-    )
+    # Computed as create_by_region() and create_custom_regions() compute
+    # their regions, filling the days without a press release.
+    matrix = AreaMatrix.from_long(df_custom_region, (CASES,), REGION)
+    return _group_stats(matrix, CASES, np.array([region_pop], dtype=float),
+                        REGION_COLUMNS, REGION).drop(columns=REGION)
 
 
-def health_dept_ts(many_daily_pr, variable):
-    df = pd.DataFrame([x[variable] for x in many_daily_pr])
-    df[DATE] = [pd.to_datetime(x[DATE]) for x in many_daily_pr]
-    return (
-        pd.melt(df, id_vars=DATE, var_name=const.HEALTH_DPET,
-                value_name=variable)
-        .sort_values([DATE, const.HEALTH_DPET]).reset_index(drop=True)
-    )
+def create_custom_regions(df_area: pd.DataFrame,
+                          regions: Dict[str, Iterable[str]]) -> pd.DataFrame:
+    """Tallies the cases and case rates of many custom defined regions at
+        once, computed as create_by_region() computes its regions.
+
+    The area table is pivoted to a date by area matrix once, and every region
+        is summed by multiplying it with an area by region incidence matrix.
+
+    Args:
+        df_area: A time series where each entry has date, area, and case
+            count information.
+        regions: The areas of each region by the region's name. An area may
+            be in any number of regions.
+
+    Returns:
+        Time series DataFrame with the entries: Date, Region, Cases, New
+            Cases, its 14 day average, Case Rate and the 14 day average per
+            capita, sorted by date and then in the order of regions.
+    """
+    names = list(regions)
+    members = [list(x) for x in regions.values()]
+    areas = [area for x in members for area in x]
+    region_codes = np.repeat(np.arange(len(names)), [len(x) for x in members])
+    region_pop = np.bincount(region_codes, area_registry.population(areas),
+                             minlength=len(names))
+
+    matrix = AreaMatrix.from_long(df_area, (CASES,), duplicates=SUM)
+    area_index = pd.Index(matrix.areas).get_indexer(
+        area_registry.resolve(areas))
+    incidence = np.zeros((len(matrix.areas), len(names)))
+    incidence[area_index[area_index >= 0],
+              region_codes[area_index >= 0]] = 1
+    return _group_stats(matrix.combine(incidence, names), CASES, region_pop,
+                        REGION_COLUMNS, REGION).convert_dtypes()
+
+
+def health_dept_ts(tables: ingest.Tables, variable: str) -> pd.DataFrame:
+    """Cases or deaths of each health department on every date."""
+    return make_ts_general(tables, const.HEALTH_DPET, const.HEALTH_DPET,
+                           variable)
+
+
+def aggregate_column(tables: ingest.Tables, variable: str) -> List:
+    """A statistic reported once per press release, in date order."""
+    return tables[const.AGGREGATE][variable].to_list()
+
+
+def release_dates(many_daily_pr) -> List[pd.Timestamp]:
+    return ingest.tables(many_daily_pr)[const.AGGREGATE][DATE].to_list()
+
 
 AGGREGATE_VAR_NAMES = {
     const.CASES: (const.NEW_CASES, const.NEW_CASES_7_DAY_AVG,
@@ -336,15 +450,16 @@ AGGREGATE_VAR_NAMES = {
 }
 
 def aggregate_single_stat(many_daily_pr, variable):
+    tables = ingest.tables(many_daily_pr)
     if variable not in [const.CASES, const.DEATHS]:
         raise ValueError(f'Variable must be {const.CASES} or {const.DEATHS}')
     var_daily_change = AGGREGATE_VAR_NAMES[variable][0]
     var_daily_change_avg = AGGREGATE_VAR_NAMES[variable][1]
     var_daily_change_avg_per_capita = AGGREGATE_VAR_NAMES[variable][2]
 
-    df = (health_dept_ts(many_daily_pr, variable).groupby(DATE)
+    df = (health_dept_ts(tables, variable).groupby(DATE)
           .sum().reset_index())
-    df[var_daily_change] = [x[var_daily_change] for x in many_daily_pr]
+    df[var_daily_change] = aggregate_column(tables, var_daily_change)
     df = pd.concat([df, NO_REPORT_DATES[[const.DATE, var_daily_change]]])
 
     return covid_tools.calc.normalize_population(
@@ -357,16 +472,13 @@ def aggregate_single_stat(many_daily_pr, variable):
 
 
 def aggregate_stats(many_daily_pr):
+    tables = ingest.tables(many_daily_pr)
     df_hospital = covid_tools.calc.compute_all(
-        pd.DataFrame({
-            DATE: [pd.to_datetime(x[DATE]) for x in many_daily_pr],
-            const.HOSPITALIZATIONS: [
-                x[const.HOSPITALIZATIONS] for x in many_daily_pr
-            ],
-        }), DATE, const.HOSPITALIZATIONS, const.NEW_HOSPITALIZATIONS,
+        tables[const.AGGREGATE][[DATE, const.HOSPITALIZATIONS]].copy(), DATE,
+        const.HOSPITALIZATIONS, const.NEW_HOSPITALIZATIONS,
         const.NEW_HOSPITALIZATIONS_7_DAY_AVG, avg_window=7, ffill_missing=False
     )
-    df_cases, df_deaths = [aggregate_single_stat(many_daily_pr, x)
+    df_cases, df_deaths = [aggregate_single_stat(tables, x)
                            for x in (const.CASES, const.DEATHS)]
     df = pd.merge(
         pd.merge(df_cases, df_deaths, 'left', DATE),
@@ -381,31 +493,471 @@ def aggregate_stats(many_daily_pr):
     df[const.NEW_DEATHS_7_DAY_AVG_PER_CAPITA] = df[
         const.NEW_DEATHS_7_DAY_AVG_PER_CAPITA
     ].round(4)
-    return (df[df[const.NEW_CASES].notna()].copy()
-            .sort_values(const.DATE).reset_index(drop=True))
-
-
-def generate_all_ts(many_daily_pr=None):
-    if many_daily_pr is None and os.path.isfile(TS_CACHE):
-        with open(TS_CACHE, 'rb') as f:
-            return pickle.load(f)
-    df_area = create_by_area(many_daily_pr)
-    all_ts = {
-        const.AGGREGATE: aggregate_stats(many_daily_pr),
-        const.AGE_GROUP: create_by_age(many_daily_pr),
-        const.GENDER: create_by_gender(many_daily_pr),
-        const.RACE: create_by_race(many_daily_pr),
-        const.AREA: df_area,
-        const.REGION: create_by_region(df_area, BAD_DATE_AREA),
+    return df[df[const.NEW_CASES].notna()].sort_values(const.DATE,
+                                                       ignore_index=True)
+
+
+def _region_ts(df_area: pd.DataFrame) -> pd.DataFrame:
+    return create_by_region(df_area, BAD_DATE_AREA)
+
+
+# The functions each table is built with, its builder first, and the press
+# release keys it is built from. The region table is built from the area table.
+TABLE_SOURCES = {
+    const.AGGREGATE: ((aggregate_stats,),
+                      (const.NEW_CASES, const.NEW_DEATHS,
+                       const.HOSPITALIZATIONS, CASES, DEATHS)),
+    const.AGE_GROUP: ((create_by_age,), (const.CASES_BY_AGE,)),
+    const.GENDER: ((create_by_gender,), (const.CASES_BY_GENDER,)),
+    const.RACE: ((create_by_race,),
+                 (const.CASES_BY_RACE, const.DEATHS_BY_RACE)),
+    const.AREA: ((create_by_area,), (AREA, CASES)),
+    const.REGION: ((_region_ts, create_by_area), (AREA, CASES)),
+}
+# Tables built from another table rather than from the press releases.
+TABLE_DEPENDS = {const.REGION: const.AREA}
+# The sections of the store each table is built from.
+TABLE_SECTIONS = {
+    const.AGGREGATE: (const.AGGREGATE, const.HEALTH_DPET),
+    const.AGE_GROUP: (const.CASES_BY_AGE,),
+    const.GENDER: (const.CASES_BY_GENDER,),
+    const.RACE: (const.CASES_BY_RACE, const.DEATHS_BY_RACE),
+    const.AREA: (const.AREA, const.HEALTH_DPET),
+}
+
+# The order of the groups of columns held as ordered categoricals by
+# lean_dtypes(). Groups not listed here follow in sorted order.
+GROUP_ORDER = {
+    const.AGE_GROUP: sorted(AGE_SORT_MAP, key=AGE_SORT_MAP.get),
+    REGION: sorted(SPA_NUMBERS, key=SPA_NUMBERS.get),
+}
+INT32 = np.iinfo(np.int32)
+
+
+def lean_dtypes(df: pd.DataFrame) -> pd.DataFrame:
+    """A table in the smallest dtypes its values allow. Integers become int32,
+        or the nullable Int32 when missing, if they are in its range. Floats
+        become float32 with NaN for missing values, and text becomes
+        categorical, ordered for the groups of GROUP_ORDER. Dates, booleans
+        and categoricals are kept.
+    """
+    columns = {}
+    for name, series in df.items():
+        if name in GROUP_ORDER:
+            groups = set(series.dropna()) - set(GROUP_ORDER[name])
+            columns[name] = pd.Categorical(
+                series, categories=[*GROUP_ORDER[name], *sorted(groups)],
+                ordered=True
+            )
+        elif (isinstance(series.dtype, pd.CategoricalDtype)
+              or pd.api.types.is_bool_dtype(series)
+              or pd.api.types.is_datetime64_any_dtype(series)):
+            columns[name] = series
+        elif pd.api.types.is_integer_dtype(series):
+            if series.notna().any() and (series.min() < INT32.min
+                                         or series.max() > INT32.max):
+                columns[name] = series
+            else:
+                columns[name] = series.astype(
+                    'Int32' if series.hasnans else np.int32)
+        elif pd.api.types.is_float_dtype(series):
+            columns[name] = series.to_numpy(dtype=np.float32,
+                                            na_value=np.nan)
+        else:
+            columns[name] = series.astype('category')
+    return pd.DataFrame(columns, index=df.index)
+
+
+def _build_table(table: str, source, trace: bool = False
+                 ) -> Tuple[pd.DataFrame, float, Optional[int]]:
+    """Builds a table from the press releases, or from the table it depends
+        on, and times it.
+    Args:
+        table: The table to build.
+        source: The section tables, or the table it depends on.
+        trace: Also measures the peak memory allocated while building, with
+            tracemalloc.
+    Returns:
+        The table, the seconds taken and the peak bytes allocated, or None if
+        not traced or memory was already being traced.
+    """
+    trace = trace and not tracemalloc.is_tracing()
+    if trace:
+        tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        df = TABLE_SOURCES[table][0][0](source)
+        seconds = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1] if trace else None
+    finally:
+        if trace:
+            tracemalloc.stop()
+    return df, seconds, peak
+
+
+def _build_tables(tables: Iterable[str], many_daily_pr: ingest.Tables,
+                  built: Dict[str, pd.DataFrame], jobs: Optional[int] = None,
+                  timings: Optional[Dict[str, float]] = None,
+                  memory: Optional[Dict[str, int]] = None
+                  ) -> Dict[str, pd.DataFrame]:
+    """Builds tables, each as soon as the table it depends on is built.
+    Args:
+        tables: The tables to build.
+        many_daily_pr: Section tables of the press releases.
+        built: Tables already built, which others may depend on.
+        jobs: The number of processes building tables at once. None or 1
+            builds every table in this process.
+        timings: Records the seconds taken to build each table.
+        memory: Records the peak bytes allocated while building each table.
+            Memory is only traced when given, as tracing slows the build.
+    Returns:
+        A dictionary of the tables built.
+    """
+    pending = [x for x in TABLE_SOURCES if x in tables]
+    built = dict(built)
+    timings = {} if timings is None else timings
+    trace = memory is not None
+
+    def record(table, result):
+        built[table], timings[table], peak = result
+        if peak is not None:
+            memory[table] = peak
+
+    def source(table):
+        depends = TABLE_DEPENDS.get(table)
+        return many_daily_pr if depends is None else built[depends]
+
+    def ready():
+        return [x for x in pending
+                if TABLE_DEPENDS.get(x) in (None, *built)]
+
+    if not jobs or jobs == 1:
+        # Tables are declared after the tables they depend on.
+        for table in pending:
+            record(table, _build_table(table, source(table), trace))
+        return {x: built[x] for x in pending}
+
+    tables = tuple(pending)
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        running = {}
+        while pending:
+            for table in ready():
+                pending.remove(table)
+                running[executor.submit(_build_table, table, source(table),
+                                        trace)] = table
+            if not running:
+                raise ValueError(f'{pending} depend on tables not built')
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                record(running.pop(future), future.result())
+        for future in as_completed(running):
+            record(running[future], future.result())
+    return {x: built[x] for x in tables}
+
+
+def _table_fingerprints(dates: Sequence,
+                        tables: Iterable[str] = TABLE_SOURCES
+                        ) -> Dict[str, str]:
+    """Fingerprints of each table built from press releases of these dates,
+        covering the code building the table and the fingerprints of the keys
+        it reads from each release.
+    """
+    dates = [f'{x:%Y-%m-%d}' for x in dates]
+    releases = [fingerprint.release(x) for x in dates]
+    return {
+        table: fingerprint.digest(
+            [fingerprint.code(x) for x in functions], dates,
+            [[x[y] for y in keys] for x in releases]
+        ) for table, (functions, keys) in TABLE_SOURCES.items()
+        if table in tables
     }
-    with open(TS_CACHE, 'wb') as f:
-        pickle.dump(all_ts, f)
-    return all_ts
+
+
+def _table_cache_path(table: str) -> str:
+    return os.path.join(
+        TS_CACHE, f"{table.lower().replace('/', '-').replace(' ', '-')}.feather"
+    )
+
+
+def _file_digest(path: str) -> str:
+    sha256 = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def _load_manifest() -> Dict[str, Dict[str, Any]]:
+    if not os.path.isfile(TS_MANIFEST):
+        return {}
+    with open(TS_MANIFEST) as f:
+        return json.load(f)
+
+
+def _load_table_cache(table: str) -> Dict[str, Any]:
+    """The fingerprint and press release dates a cached table was built from,
+        or an empty dictionary if it is missing or its file does not match
+        the manifest.
+    """
+    entry = _load_manifest().get(table)
+    path = _table_cache_path(table)
+    if (entry is None or not os.path.isfile(path)
+            or _file_digest(path) != entry['sha256']):
+        return {}
+    return {'fingerprint': entry['fingerprint'],
+            'dates': [pd.Timestamp(x) for x in entry['dates']]}
+
+
+def _read_table_cache(table: str,
+                      columns: Optional[Sequence[str]] = None
+                      ) -> pd.DataFrame:
+    """Reads a cached table, or some of its columns, by memory mapping its
+        file.
+    """
+    return feather.read_table(_table_cache_path(table), columns=columns,
+                              memory_map=True).to_pandas()
+
+
+def _write_table_cache(table: str, table_fingerprint: str, dates: Sequence,
+                       df: pd.DataFrame) -> None:
+    """Writes a table as an uncompressed Feather file, which can be memory
+        mapped, and records it in the manifest.
+    """
+    os.makedirs(TS_CACHE, exist_ok=True)
+    tmp_path = f'{(path := _table_cache_path(table))}.tmp'
+    feather.write_feather(df.reset_index(drop=True), tmp_path,
+                          compression='uncompressed')
+    sha256 = _file_digest(tmp_path)
+    os.replace(tmp_path, path)
+    with _manifest_lock:
+        manifest = _load_manifest()
+        manifest[table] = {
+            'fingerprint': table_fingerprint,
+            'dates': [f'{x:%Y-%m-%d}' for x in dates],
+            'sha256': sha256,
+        }
+        tmp_path = f'{TS_MANIFEST}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(manifest, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, TS_MANIFEST)
+
+
+class TimeSeries(Mapping):
+    """The time series tables by name. Each table is loaded from its cache,
+        or built if the cache is out of date, when first read and then kept,
+        so reading one table does not load or build the others.
+    Args:
+        many_daily_pr: The section tables of the press releases to build
+            from. If None, a cached table is used when its code is current,
+            otherwise it is built from the sections of the store it reads.
+        tables: Tables already built from those press releases.
+        dates: The dates of the press releases the tables were built from.
+        lean: Holds the tables in the dtypes of lean_dtypes(). They are
+            cached in the dtypes they are built in either way.
+    """
+
+    def __init__(self, many_daily_pr: Optional[ingest.Tables] = None,
+                 tables: Optional[Dict[str, pd.DataFrame]] = None,
+                 dates: Optional[Sequence] = None, lean: bool = False):
+        self._source = many_daily_pr
+        self._lean = lean
+        self._tables = {x: self._convert(y) for x, y in (tables or {}).items()}
+        self._dates = {x: list(dates) for x in self._tables}
+        self._lock = threading.RLock()
+
+    def _convert(self, df: pd.DataFrame) -> pd.DataFrame:
+        return lean_dtypes(df) if self._lean else df
+
+    def __getitem__(self, table: str) -> pd.DataFrame:
+        if table not in TABLE_SOURCES:
+            raise KeyError(table)
+        with self._lock:
+            if table not in self._tables:
+                df, self._dates[table] = self._load(table)
+                self._tables[table] = self._convert(df)
+            return self._tables[table]
+
+    def __iter__(self):
+        return iter(TABLE_SOURCES)
+
+    def __len__(self) -> int:
+        return len(TABLE_SOURCES)
+
+    def read(self, table: str, columns: Sequence[str]) -> pd.DataFrame:
+        """Some columns of a table. When the table is not yet loaded and its
+            cache is current, only those columns are read from the cache.
+        """
+        with self._lock:
+            if (table not in self._tables and self._source is None
+                    and TABLE_DEPENDS.get(table) is None):
+                cached = _load_table_cache(table)
+                if cached and cached['fingerprint'] == _table_fingerprints(
+                        cached['dates'], (table,))[table]:
+                    return self._convert(_read_table_cache(table, columns))
+            return self[table][list(columns)]
+
+    def _load(self, table: str) -> Tuple[pd.DataFrame, List]:
+        cached = _load_table_cache(table)
+        if (depends := TABLE_DEPENDS.get(table)) is not None:
+            source = self[depends]
+            dates = self._dates[depends]
+        elif self._source is not None:
+            source = self._source
+            dates = release_dates(source)
+        else:
+            source = None
+            dates = list(cached.get('dates', ()))
+        table_fingerprint = _table_fingerprints(dates, (table,))[table]
+        if (cached and cached['fingerprint'] == table_fingerprint
+                and cached['dates'] == dates):
+            return _read_table_cache(table), dates
+        if source is None:
+            source = store.load(TABLE_SECTIONS[table])
+            dates = list(store.stored_dates())
+            table_fingerprint = _table_fingerprints(dates, (table,))[table]
+        df, _, _ = _build_table(table, source)
+        _write_table_cache(table, table_fingerprint, dates, df)
+        return df, dates
+
+
+# Incremental builds give the builders only the press releases of the last
+# TAIL_DAYS before the new ones, enough for the 60 days over which areas must
+# be active and the 14-day averages. The rows of the last OVERLAP_DAYS cached
+# releases are built again and must match the cache, otherwise the table is
+# rebuilt in full.
+TAIL_DAYS = 90
+OVERLAP_DAYS = 7
+
+
+def _tail(tables: ingest.Tables, start: pd.Timestamp) -> ingest.Tables:
+    """Section tables of the press releases from a date onward."""
+    return {x: df[df[DATE] >= start].reset_index(drop=True)
+            for x, df in tables.items()}
+
+
+def _same_rows(df_a: pd.DataFrame, df_b: pd.DataFrame) -> bool:
+    """Compares the values of two tables, ignoring their index and dtypes."""
+    return (df_a.reset_index(drop=True).astype(object)
+            .equals(df_b.reset_index(drop=True).astype(object)))
+
+
+def _extend(df_cached: pd.DataFrame, df_tail: pd.DataFrame,
+            overlap_start: pd.Timestamp,
+            new_start: pd.Timestamp) -> Optional[pd.DataFrame]:
+    """Appends the rows of new dates, built from the last press releases, to
+        a cached table.
+    Returns:
+        The extended table, or None if the rows rebuilt for cached dates from
+        overlap_start differ from the cache, or if the areas differ, as when
+        an area becomes active or inactive across the whole history.
+    """
+    if AREA in df_tail and (set(df_tail[AREA].dropna().unique())
+                            != set(df_cached[AREA].dropna().unique())):
+        return None
+    # Rows are compared and kept by date rather than by position, as the
+    # aggregate table also has rows for the dates without a press release,
+    # which may be after the last cached release.
+    cached_dates, tail_dates = df_cached[DATE], df_tail[DATE]
+    if not _same_rows(
+            df_cached[(cached_dates >= overlap_start)
+                      & (cached_dates < new_start)],
+            df_tail[(tail_dates >= overlap_start) & (tail_dates < new_start)]):
+        return None
+    df = pd.concat([df_cached[cached_dates < new_start],
+                    df_tail[tail_dates >= new_start]], ignore_index=True)
+    if AREA in df:
+        df[AREA] = area_registry.categorical(df[AREA])
+    return df
+
+
+def _appendable(table: str, cached: Dict[str, Any], dates: Sequence) -> bool:
+    """Whether a cached table only lacks the rows of newer press releases."""
+    cached_dates = list(cached.get('dates', ()))
+    return (len(cached_dates) > OVERLAP_DAYS
+            and len(dates) > len(cached_dates)
+            and list(dates[:len(cached_dates)]) == cached_dates
+            and cached['fingerprint']
+            == _table_fingerprints(cached_dates, (table,))[table])
+
+
+def generate_all_ts(many_daily_pr=None, incremental: bool = False,
+                    jobs: Optional[int] = None,
+                    timings: Optional[Dict[str, float]] = None,
+                    memory: Optional[Dict[str, int]] = None,
+                    lean: bool = False) -> TimeSeries:
+    """Builds every time series table. Tables cached from the same press
+        releases with the same code are reused, so only the tables affected by
+        a change in the parser, corrections or time series code are rebuilt.
+    Args:
+        many_daily_pr: Parsed press releases from any iterable, or the
+            section tables from store.load(). If None, and not incremental,
+            the tables are only loaded or built when read from the returned
+            TimeSeries.
+        incremental: Extends cached tables with the press releases newer than
+            the cache, building only from the last TAIL_DAYS press releases,
+            so the daily cost does not grow with the history. With None, every
+            press release in the store is included, but only those from the
+            tail are read. The tables are the same as a full rebuild.
+        jobs: The number of processes building tables at once. Tables which
+            do not depend on each other are built concurrently, and the
+            region table as soon as the area table is built.
+        timings: Records the seconds taken to build each table, and the
+            total as 'generate_all_ts'.
+        memory: Records the peak bytes allocated while building each table.
+        lean: Holds the returned tables in the dtypes of lean_dtypes().
+    """
+    if many_daily_pr is None and not incremental:
+        return TimeSeries(lean=lean)
+    start = time.perf_counter()
+    timings = {} if timings is None else timings
+    if many_daily_pr is None:
+        dates = list(store.stored_dates())
+    else:
+        many_daily_pr = ingest.tables(many_daily_pr)
+        dates = release_dates(many_daily_pr)
+    fingerprints = _table_fingerprints(dates)
+    cached = {x: _load_table_cache(x) for x in TABLE_SOURCES}
+    all_ts = {x: _read_table_cache(x) for x in TABLE_SOURCES
+              if cached[x] and cached[x]['fingerprint'] == fingerprints[x]
+              and cached[x]['dates'] == dates}
+    reused = set(all_ts)
+
+    appendable = [x for x in TABLE_SOURCES if incremental
+                  and x not in all_ts and _appendable(x, cached[x], dates)]
+    if appendable:
+        # The first date rebuilt to check, and the first new date
+        starts = {x: (dates[len(cached[x]['dates']) - OVERLAP_DAYS],
+                      dates[len(cached[x]['dates'])]) for x in appendable}
+        tail_start = (min(x for x, _ in starts.values())
+                      - pd.Timedelta(TAIL_DAYS, 'days'))
+        tail = (store.load(start=tail_start) if many_daily_pr is None
+                else _tail(many_daily_pr, tail_start))
+        df_tails = _build_tables(
+            [x for x in appendable
+             if TABLE_DEPENDS.get(x) in (None, *appendable)],
+            tail, {}, jobs, timings, memory
+        )
+        for table, df_tail in df_tails.items():
+            if TABLE_DEPENDS.get(table) not in (None, *all_ts):
+                continue  # The table it depends on is rebuilt in full
+            df = _extend(_read_table_cache(table), df_tail, *starts[table])
+            if df is not None:
+                all_ts[table] = df
+
+    if stale := [x for x in TABLE_SOURCES if x not in all_ts]:
+        if many_daily_pr is None:
+            many_daily_pr = store.load()
+        all_ts.update(_build_tables(stale, many_daily_pr, all_ts, jobs,
+                                    timings, memory))
+    for table in (x for x in TABLE_SOURCES if x not in reused):
+        _write_table_cache(table, fingerprints[table], dates, all_ts[table])
+    timings['generate_all_ts'] = time.perf_counter() - start
+    return TimeSeries(many_daily_pr, all_ts, dates, lean)
 
 
 if __name__ == "__main__":
     every_day = access.query_all()
-    last_month = every_day[-30:]
+    last_month = tuple(access.iter_press_releases(list(access.PRID)[-30]))
     today = every_day[-1]
 
     # df_summary = aggregate_stats(every_day)
@@ -2,6 +2,8 @@ import datetime as dt
 
 from lac_covid19.const import *
 import lac_covid19.daily_pr.access as access
+import lac_covid19.daily_pr.crawl as crawl
+import lac_covid19.daily_pr.store as store
 from lac_covid19.daily_pr.time_series import generate_all_ts
 
 def _print_sub_dict(dict_, key):
@@ -30,5 +32,13 @@ def query_date(date=dt.date.today().isoformat(), json_cache=True, html_cache=Tru
           sep='\n')
 
 
-def update_ts():
-    return generate_all_ts(access.query_all(False))
\ No newline at end of file
+def update_ts(discover=False):
+    """Writes every press release to the store and updates the time series.
+    Args:
+        discover: First requests the pages after the last known press release
+            ID to find new releases.
+    """
+    if discover:
+        crawl.discover()
+    store.write(access.query_all(False))
+    return generate_all_ts(incremental=True)
\ No newline at end of file
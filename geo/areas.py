@@ -0,0 +1,147 @@
+"""A registry of the countywide statistical areas. Every area has a stable
+    integer code, its position in area-codes.json, so area columns are held as
+    categoricals whose codes are the area codes, and the region, population
+    and ArcGIS ObjectID of every row are found by indexing an array with them.
+
+Names are resolved to the registry's spelling first. The trailing asterisk
+    marking a correctional facility outbreak, repeated whitespace, a repeated
+    "City of" and the names of the health departments are all aliases. Areas
+    missing from the registry are added with the next code for the rest of the
+    process.
+"""
+
+import json
+import os.path
+import threading
+from typing import Any, Dict, Iterable, List
+
+import numpy as np
+import pandas as pd
+
+import lac_covid19.const as const
+from lac_covid19.geo.paths import DIR_DATA
+
+AREA_CODES = os.path.join(DIR_DATA, 'area-codes.json')
+_CSA_REGION_MAP_JSON = os.path.join(DIR_DATA, 'csa-region-map.json')
+_CSA_OBJECTID = os.path.join(DIR_DATA, 'csa-objectid.json')
+
+MISSING = -1  # The code of a missing name, as in a categorical
+CITY_OF = 'City of '
+ALIASES = const.hd.HD_CSA_MAP
+
+_lock = threading.Lock()
+_tables = {}
+
+with open(AREA_CODES) as f:
+    NAMES: List[str] = json.load(f)
+CODES: Dict[str, int] = {x: i for i, x in enumerate(NAMES)}
+
+
+def canonical(name: str) -> str:
+    """The registry's spelling of an area name."""
+    name = ' '.join(name.split()).rstrip('*').rstrip()
+    while name.startswith(CITY_OF + CITY_OF):
+        name = name[len(CITY_OF):]
+    return ALIASES.get(name, name)
+
+
+def code(name: str) -> int:
+    """The code of an area, adding it to the registry if it is new."""
+    if (area_code := CODES.get(name)) is not None:
+        return area_code
+    name = canonical(name)
+    with _lock:
+        if name not in CODES:
+            CODES[name] = len(NAMES)
+            NAMES.append(name)
+        return CODES[name]
+
+
+def codes(names: Iterable[str]) -> np.ndarray:
+    """The codes of many area names, resolving each distinct name once.
+        Missing names have the code MISSING.
+    """
+    if not isinstance(names, (pd.Series, pd.Categorical, pd.Index)):
+        names = list(names)
+    names = pd.Categorical(names)
+    category_codes = np.array([code(x) for x in names.categories] + [MISSING],
+                              dtype=np.int32)
+    # The code -1 of a missing name selects MISSING at the end.
+    return category_codes[names.codes]
+
+
+def resolve(names: Iterable[str]) -> np.ndarray:
+    """The registry's spelling of many area names, or None where missing."""
+    area_codes = codes(names)
+    return np.array(NAMES + [None], dtype=object)[area_codes]
+
+
+def categorical(names: Iterable[str]) -> pd.Categorical:
+    """Area names as a categorical whose codes are the area codes."""
+    area_codes = codes(names)
+    return pd.Categorical.from_codes(area_codes, categories=list(NAMES))
+
+
+def _load_region() -> Dict[str, Any]:
+    with open(_CSA_REGION_MAP_JSON) as f:
+        return json.load(f)
+
+
+def _load_objectid() -> Dict[str, Any]:
+    with open(_CSA_OBJECTID) as f:
+        return {x['attributes'][const.AREA]: x['attributes'][const.OBJECTID]
+                for x in json.load(f)['features']}
+
+
+def _load_population() -> Dict[str, Any]:
+    # The populations are queried from the live dashboard, so they are only
+    # read when needed.
+    import lac_covid19.population as population
+    return dict(population.CSA.items())
+
+
+_SOURCES = {
+    const.REGION: (_load_region, object, None),
+    const.OBJECTID: (_load_objectid, float, np.nan),
+    const.POPULATION: (_load_population, float, np.nan),
+}
+
+
+def _table(name: str) -> np.ndarray:
+    """An attribute of every area, indexed by area code and followed by the
+        value for a missing area. Rebuilt when areas are added.
+    """
+    with _lock:
+        if name not in _tables:
+            load, _, _ = _SOURCES[name]
+            _tables[name] = (
+                None, {canonical(k): v for k, v in load().items()}
+            )
+        table, values = _tables[name]
+        if table is None or len(table) != len(NAMES) + 1:
+            _, dtype, missing = _SOURCES[name]
+            table = np.array([values.get(x, missing) for x in NAMES]
+                             + [missing], dtype=dtype)
+            _tables[name] = table, values
+        return table
+
+
+def _lookup(name: str, names: Iterable[str]) -> np.ndarray:
+    # The codes are found first, as they may add areas to the table.
+    area_codes = codes(names)
+    return _table(name)[area_codes]
+
+
+def region(names: Iterable[str]) -> np.ndarray:
+    """The service planning area of each area, or None if it has none."""
+    return _lookup(const.REGION, names)
+
+
+def population(names: Iterable[str]) -> np.ndarray:
+    """The population of each area, or NaN if it is not known."""
+    return _lookup(const.POPULATION, names)
+
+
+def objectid(names: Iterable[str]) -> np.ndarray:
+    """The ArcGIS ObjectID of each area, or NaN if it has none."""
+    return _lookup(const.OBJECTID, names)
@@ -1,6 +1,7 @@
 import json
 import os.path
 import geopandas
+import pandas as pd
 from shapely.affinity import scale
 
 from lac_covid19.const.groups import (SPA_AV, SPA_SF, SPA_SG, SPA_M,
@@ -8,6 +9,7 @@ from lac_covid19.const.groups import (SPA_AV, SPA_SF, SPA_SG, SPA_M,
 
 from lac_covid19.const.columns import AREA, REGION, OBJECTID
 from lac_covid19.const import JSON_COMPACT
+import lac_covid19.geo.areas as areas
 from lac_covid19.geo.paths import DIR_DATA
 
 _CSA_REGION_MAP_JSON = os.path.join(DIR_DATA, 'csa-region-map.json')
@@ -136,8 +138,9 @@ CSA_BLANK = (
     .rename(columns={'LABEL': AREA}).copy()
 )
 CSA_BLANK[AREA] = CSA_BLANK[AREA].convert_dtypes()
-CSA_BLANK[OBJECTID] = (CSA_BLANK[AREA]
-                       .apply(CSA_OBJECTID_MAP.get).convert_dtypes())
+CSA_BLANK[OBJECTID] = pd.Series(
+    areas.objectid(CSA_BLANK[AREA]), index=CSA_BLANK.index
+).convert_dtypes()
 
 
 if __name__ == "__main__":
@@ -1,6 +1,10 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import functools
 import math
 import os.path
 import re
+import time
 
 import pandas as pd
 
@@ -8,9 +12,9 @@ import lac_covid19.const as const
 from lac_covid19.daily_pr.update import query_date, update_ts
 from lac_covid19.current_stats.scrape import query_live
 from lac_covid19.current_stats.citations import CITATIONS
-from lac_covid19.population import CSA as CSA_POPULATION
 from lac_covid19.daily_pr.time_series import generate_all_ts
-from lac_covid19.geo.csa import CSA_BLANK, CSA_REGION_MAP
+from lac_covid19.geo.csa import CSA_BLANK
+import lac_covid19.geo.areas as area_registry
 import lac_covid19.geo.geocoder as geocoder
 
 tz_offset = pd.to_timedelta(8, unit='hours')
@@ -21,6 +25,8 @@ DIR_ARCGIS_UPLOAD, DIR_ARCGIS_APPEND = [os.path.join(DIR_EXPORT, f'arcgis-{x}')
                                         for x in ('upload', 'append')]
 DIR_TS, DIR_LIVE = [os.path.join(DIR_DOCS, x) for x in ('time-series', 'live')]
 
+PUBLISH_WORKERS = 10  # Enough for every stage which can run at once
+
 
 def datetime_input(obj):
     if isinstance(obj, pd.Timestamp):
@@ -33,7 +39,7 @@ def datetime_input(obj):
 
 def choropleth_colors(df_area_day, col, lower, upper):
     if df_area_day is None:
-        df_area_day = generate_all_ts()[const.AREA]
+        df_area_day = generate_all_ts().read(const.AREA, [const.DATE, col])
         df_area_day = df_area_day[
             df_area_day[const.DATE]==df_area_day[const.DATE].max()
         ]
@@ -47,9 +53,10 @@ def arcgis_live_map(df_area, lower=0.05, upper=0.95):
         [const.AREA, const.CASES, const.CASES_PER_CAPITA,
          const.NEW_CASES_14_DAY_AVG, const.NEW_CASES_14_DAY_AVG_PER_CAPITA]
     ].copy()
-    df_area[const.REGION] = df_area[const.AREA].apply(CSA_REGION_MAP.get)
-    df_area[const.POPULATION] = (df_area[const.AREA].apply(CSA_POPULATION.get)
-                                 .fillna(pd.NA).astype('Int64'))
+    df_area[const.REGION] = area_registry.region(df_area[const.AREA])
+    df_area[const.POPULATION] = pd.Series(
+        area_registry.population(df_area[const.AREA]), index=df_area.index
+    ).astype('Int64')
     df = CSA_BLANK.merge(df_area, on=const.AREA)
     filename = 'csa-live-map'
     df.to_file(os.path.join(DIR_ARCGIS_UPLOAD, f'{filename}.geojson'),
@@ -75,7 +82,7 @@ def arcgis_csa_ts(df_area, append_date=None):
          & (df_area[const.DATE] >= arcgis_csa_days_back(df_area))),
         [const.DATE, const.AREA, const.CASES, const.NEW_CASES]
     ].copy()
-    df_area[const.REGION] = df_area[const.AREA].apply(CSA_REGION_MAP.get)
+    df_area[const.REGION] = area_registry.region(df_area[const.AREA])
     df_area = df_area[[const.DATE, const.AREA, const.REGION,
                        const.CASES, const.NEW_CASES]]
     filename = 'csa-ts.csv'
@@ -181,28 +188,115 @@ def export_live(live_dict):
         live_dict[key].to_csv(os.path.join(DIR_LIVE, filename), index=False)
 
 
-def publish(date=None, update_live=True, ts_cache=False, live_cache=False):
-    if update_live:
-        export_live(live_dict := query_live(live_cache))
-        geocoder.prep_addresses()
-        arcgis_live_non_res(live_dict[const.NON_RESIDENTIAL])
-        arcgis_live_edu(live_dict[const.EDUCATION])
+def _timed(timings, name, func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    timings[name] = time.perf_counter() - start
+    return result
 
-    arcgis_citations()
 
+async def _stage(timings, name, func, *args):
+    """Runs a blocking step in the default thread pool and records its
+        wall-clock time.
+    """
+    return await asyncio.get_running_loop().run_in_executor(
+        None, functools.partial(_timed, timings, name, func, *args)
+    )
+
+
+async def _publish_live(timings, live_cache):
+    """Fetches the live page, geocodes its addresses, then writes the outbreak
+        and citation exports, which need the geocoded addresses.
+    """
+    live_dict = await _stage(timings, 'query_live', query_live, live_cache)
+    await asyncio.gather(
+        _stage(timings, 'export_live', export_live, live_dict),
+        _stage(timings, 'prep_addresses', geocoder.prep_addresses),
+    )
+    await asyncio.gather(
+        _stage(timings, 'arcgis_live_non_res', arcgis_live_non_res,
+               live_dict[const.NON_RESIDENTIAL]),
+        _stage(timings, 'arcgis_live_edu', arcgis_live_edu,
+               live_dict[const.EDUCATION]),
+        _stage(timings, 'arcgis_citations', arcgis_citations),
+    )
+
+
+def _load_all_ts():
+    """Loads every cached time series table. The tables of the lazy
+        TimeSeries would otherwise be loaded when first read, on the event
+        loop's thread.
+    """
+    ts_dict = generate_all_ts()
+    return {x: ts_dict[x] for x in ts_dict}
+
+
+async def _publish_ts(timings, date, ts_cache):
+    """Updates the time series from the press releases, then writes every
+        export made from them at once.
+    """
     if ts_cache:
-        ts_dict = generate_all_ts()
+        ts_dict = await _stage(timings, 'generate_all_ts', _load_all_ts)
+        exports = []
     else:
-        export_time_series(ts_dict := update_ts())
-
+        ts_dict = await _stage(timings, 'update_ts', update_ts)
+        exports = [_stage(timings, 'export_time_series', export_time_series,
+                          ts_dict)]
     if date is None:
         date = ts_dict[const.AGGREGATE][const.DATE].max()
-    arcgis_live_map(ts_dict[const.AREA])
-    arcgis_csa_ts(ts_dict[const.AREA], date)
-    # arcgis_region_ts(ts_dict[const.REGION], date)
-    arcgis_aggregate_ts(ts_dict[const.AGGREGATE], date)
-    arcgis_region_snapshot(ts_dict[const.REGION])
-    arcgis_age_snapshot(ts_dict[const.AGE_GROUP])
+    await asyncio.gather(
+        *exports,
+        _stage(timings, 'arcgis_live_map', arcgis_live_map,
+               ts_dict[const.AREA]),
+        _stage(timings, 'arcgis_csa_ts', arcgis_csa_ts, ts_dict[const.AREA],
+               date),
+        # _stage(timings, 'arcgis_region_ts', arcgis_region_ts,
+        #        ts_dict[const.REGION], date),
+        _stage(timings, 'arcgis_aggregate_ts', arcgis_aggregate_ts,
+               ts_dict[const.AGGREGATE], date),
+        _stage(timings, 'arcgis_region_snapshot', arcgis_region_snapshot,
+               ts_dict[const.REGION]),
+        _stage(timings, 'arcgis_age_snapshot', arcgis_age_snapshot,
+               ts_dict[const.AGE_GROUP]),
+    )
+
+
+async def publish_async(date=None, update_live=True, ts_cache=False,
+                        live_cache=False):
+    """Publishes every export, running the live page branch and the time
+        series branch side by side.
+    Returns:
+        A dictionary of each stage to its wall-clock seconds, with the total
+        under 'publish'.
+    """
+    timings = {}
+    start = time.perf_counter()
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(max_workers=PUBLISH_WORKERS)
+    )
+    if update_live:
+        live_branch = _publish_live(timings, live_cache)
+    else:
+        live_branch = _stage(timings, 'arcgis_citations', arcgis_citations)
+    await asyncio.gather(live_branch, _publish_ts(timings, date, ts_cache))
+    timings['publish'] = time.perf_counter() - start
+    return timings
+
+
+def stage_report(timings):
+    return '\n'.join(
+        [f'{x:>22}: {timings[x]:7.2f}s' for x in timings if x != 'publish']
+        + [f"{'publish':>22}: {timings['publish']:7.2f}s wall-clock, "
+           f"{sum(timings.values()) - timings['publish']:.2f}s in stages"]
+    )
+
+
+def publish(date=None, update_live=True, ts_cache=False, live_cache=False):
+    timings = asyncio.run(
+        publish_async(date, update_live, ts_cache, live_cache)
+    )
+    print(stage_report(timings))
+    return timings
 
 
 if __name__ == "__main__":
@@ -0,0 +1,3 @@
+"""Tests of the data pipeline, ran with `python -m pytest` from the directory
+    above the package.
+"""
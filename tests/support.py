@@ -0,0 +1,114 @@
+"""Made-up press releases, shaped as parse.parse_pr() returns them, and the
+    means to run the pipeline on them without the network or the caches in
+    the source tree.
+"""
+
+import datetime
+import os
+import os.path
+import subprocess
+import sys
+from typing import Any, Dict, List
+
+import pandas as pd
+
+import lac_covid19
+import lac_covid19.const as const
+
+# The time series published in the repository
+DIR_TS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))), 'docs', 'time-series')
+START = datetime.date(2020, 8, 1)
+# Areas of three regions and their populations.
+AREAS = {
+    'City of Burbank': 103_695,
+    'City of Glendale': 201_748,
+    'Los Angeles - Boyle Heights': 92_785,
+    'City of Santa Monica': 92_357,
+}
+HEALTH_DEPTS = (const.hd.LOS_ANGELES_COUNTY, const.hd.LONG_BEACH,
+                const.hd.PASADENA)
+AGE_GROUPS = (const.AGE_0_4, const.AGE_5_11, const.AGE_12_17,
+              const.AGE_18_29, const.AGE_30_49, const.AGE_50_64,
+              const.AGE_65_79, const.AGE_OVER_80)
+RACES = (const.RACE_ASIAN, const.RACE_BLACK, const.RACE_HL, const.RACE_WHITE,
+         const.OTHER)
+
+
+def release(day: int) -> Dict[str, Any]:
+    """The press release of a day after START. Counts grow every day by an
+        amount which differs between groups.
+    """
+    n = day + 1
+    return {
+        const.DATE: START + datetime.timedelta(day),
+        const.NEW_CASES: 1000 + 7 * (day % 5),
+        const.NEW_DEATHS: 20 + day % 3,
+        const.HOSPITALIZATIONS: 1500 - day,
+        const.CASES: {x: (i + 1) * 1000 * n + day % 4
+                      for i, x in enumerate(HEALTH_DEPTS)},
+        const.DEATHS: {x: (i + 1) * 10 * n
+                       for i, x in enumerate(HEALTH_DEPTS)},
+        const.CASES_BY_AGE: {x: (i + 2) * 300 * n + day % 7
+                             for i, x in enumerate(AGE_GROUPS)},
+        const.CASES_BY_GENDER: {const.FEMALE: 5000 * n, const.MALE: 4900 * n,
+                                const.OTHER: n},
+        const.CASES_BY_RACE: {x: (i + 1) * 800 * n
+                              for i, x in enumerate(RACES)},
+        const.DEATHS_BY_RACE: {x: (i + 1) * 8 * n
+                               for i, x in enumerate(RACES)},
+        const.AREA: [(x, (i + 1) * 50 * n + day % 3,
+                      round((i + 1) * 50 * n / population * 100_000, 2), False)
+                     for i, (x, population) in enumerate(AREAS.items())],
+    }
+
+
+def releases(days: int, first: int = 0) -> List[Dict[str, Any]]:
+    return [release(x) for x in range(first, first + days)]
+
+
+def published(name: str, start: str, end: str) -> pd.DataFrame:
+    """The rows of a published time series from one date to another."""
+    df = pd.read_csv(os.path.join(DIR_TS, f'{name}-ts.csv'),
+                     parse_dates=[const.DATE])
+    return df[(df[const.DATE] >= start)
+              & (df[const.DATE] <= end)].reset_index(drop=True)
+
+
+def offline() -> None:
+    """Replaces the query of the live dashboard, made for the population of
+        every area when lac_covid19.population is first imported, with the
+        populations of AREAS.
+    """
+    import lac_covid19.current_stats.scrape as scrape
+    scrape.query_live = lambda cached=False: {const.AREA_RECENT: pd.DataFrame(
+        {const.AREA: list(AREAS), const.POPULATION: list(AREAS.values())}
+    )}
+
+
+def redirect(root: str, setattr=setattr) -> None:
+    """Points the store, and the time series cache if it is imported, at a
+        directory.
+    """
+    import lac_covid19.daily_pr.store as store
+    setattr(store, 'DIR_PARQUET', os.path.join(root, 'parsed-parquet'))
+    setattr(store, 'FINGERPRINTS',
+            os.path.join(store.DIR_PARQUET, 'fingerprints.json'))
+    if (time_series := sys.modules.get(
+            'lac_covid19.daily_pr.time_series')) is not None:
+        setattr(time_series, 'TS_CACHE',
+                os.path.join(root, 'time-series-cache'))
+        setattr(time_series, 'TS_MANIFEST',
+                os.path.join(time_series.TS_CACHE, 'manifest.json'))
+
+
+def run_python(script: str) -> str:
+    """Runs a script in a new process and returns what it prints."""
+    # The package is a namespace package, found from the directory above it.
+    path = [os.path.dirname(os.path.abspath(list(lac_covid19.__path__)[0]))]
+    if os.environ.get('PYTHONPATH'):
+        path.append(os.environ['PYTHONPATH'])
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(path))
+    env.pop('PYTHONHASHSEED', None)
+    return subprocess.run([sys.executable, '-c', script], env=env, check=True,
+                          capture_output=True, text=True).stdout
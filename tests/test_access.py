@@ -0,0 +1,31 @@
+import pytest
+
+import lac_covid19.const as const
+import lac_covid19.daily_pr.access as access
+import lac_covid19.daily_pr.parse as parse
+
+# A release laid out in a table as on the county website, within the site's
+#   navigation and footer.
+PAGE = (
+    '<html><body><ul class="nav menu"><li><a href="/">Home</a></li></ul>'
+    '<div id="header">Los Angeles County Department of Public Health</div>'
+    '<div class="content"><p>For Immediate Release: October 24, 2020</p>'
+    '<table><tr class="tableheader"><td>Gender (Los Angeles County Cases '
+    'Only-excl. LB and Pas)</td></tr><tr><td>- Female </td><td>144436 </td>'
+    '</tr><tr><td>- Male </td><td>137551 </td></tr><tr><td>- Other </td>'
+    '<td>115 </td></tr><tr><td>- Under Investigation </td><td>2247 </td></tr>'
+    '</table></div><div class="footer">Copyright</div></body></html>'
+)
+
+
+@pytest.mark.parametrize('extract_text', [access.extract_text_bs4,
+                                          access.extract_text_lxml])
+def test_release_tables_are_kept(extract_text):
+    assert parse._parse_gender(extract_text(PAGE)) == {
+        const.FEMALE: 144436, const.MALE: 137551, const.OTHER: 115}
+
+
+def test_site_boilerplate_is_removed():
+    text = access.extract_text_lxml(PAGE)
+    assert text.startswith('For Immediate Release')
+    assert 'Home' not in text and 'Copyright' not in text
@@ -0,0 +1,84 @@
+import multiprocessing
+import os
+
+import pytest
+
+import lac_covid19.daily_pr.access as access
+import lac_covid19.daily_pr.archive as archive
+
+CODECS = [archive.ZLIB] + ([archive.ZSTD] if archive.zstandard else [])
+
+
+def _page(day):
+    # The shared navigation and footer of every page around a short release.
+    navigation = ''.join(f'<li><a href="/{x}">Section {x}</a></li>'
+                         for x in range(200))
+    return (f'<html><ul>{navigation}</ul><p>Día {day}: {1000 + day} casos '
+            f'confirmados — Öffentliche Gesundheit</p></html>')
+
+
+@pytest.fixture(autouse=True)
+def tmp_html(tmp_path, monkeypatch):
+    index = str(tmp_path / 'html-archive.json')
+    for module in (archive, access):
+        monkeypatch.setattr(module, 'DIR_HTML', str(tmp_path))
+        monkeypatch.setattr(module, 'HTML_INDEX', index)
+    monkeypatch.setattr(archive, 'HTML_ARCHIVE',
+                        str(tmp_path / 'html-archive.bin'))
+    archive._loaded.clear()
+    yield tmp_path
+    archive._loaded.clear()
+
+
+def _cache(tmp_path, days):
+    for day in days:
+        (tmp_path / f'2020-08-{day + 1:02}.html').write_text(_page(day),
+                                                             'utf-8')
+
+
+@pytest.mark.parametrize('codec', CODECS)
+def test_read_and_add_round_trip(tmp_html, codec):
+    _cache(tmp_html, range(3))
+    index = archive.build(codec=codec)
+    assert sorted(index['releases']) == ['2020-08-01', '2020-08-02',
+                                         '2020-08-03']
+    assert archive.read('2020-08-02') == _page(1)
+    assert archive.read('2020-08-09') is None
+    archive.add('2020-08-04', _page(3))
+    assert archive.contains('2020-08-04')
+    assert archive.read('2020-08-04') == _page(3)
+    assert archive.read('2020-08-01') == _page(0)
+
+
+@pytest.mark.parametrize('codec', CODECS)
+def test_few_pages_are_compressed_without_a_dictionary(tmp_html, codec):
+    _cache(tmp_html, range(3))
+    index = archive.build(codec=codec)
+    assert index['dictionary'] == [0, 0]
+    raw_size = sum(len(_page(x).encode('utf-8')) for x in range(3))
+    assert os.path.getsize(archive.HTML_ARCHIVE) < raw_size
+
+
+def test_archived_pages_are_not_cached_as_files(tmp_html):
+    access.cache_html('2020-08-01', _page(0))
+    assert (tmp_html / '2020-08-01.html').read_text('utf-8') == _page(0)
+    archive.build()
+    access.cache_html('2020-08-02', _page(1))
+    assert not (tmp_html / '2020-08-02.html').exists()
+    assert archive.read('2020-08-02') == _page(1)
+    # Rebuilding keeps the pages only held by the archive.
+    os.remove(tmp_html / '2020-08-01.html')
+    assert sorted(archive.build()['releases']) == ['2020-08-01', '2020-08-02']
+    assert archive.read('2020-08-01') == _page(0)
+
+
+@pytest.mark.skipif(archive.fcntl is None or
+                    'fork' not in multiprocessing.get_all_start_methods(),
+                    reason='needs file locks and forked workers')
+def test_processes_add_without_losing_releases(tmp_html):
+    archive.build(dates=[])
+    days = [f'2020-09-{x + 1:02}' for x in range(24)]
+    with multiprocessing.get_context('fork').Pool(8) as pool:
+        pool.starmap(archive.add, [(x, _page(i)) for i, x in enumerate(days)])
+    assert sorted(archive.build()['releases']) == days
+    assert [archive.read(x) for x in days] == [_page(x) for x in range(24)]
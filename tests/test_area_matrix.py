@@ -0,0 +1,134 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import lac_covid19.const as const
+from lac_covid19.daily_pr.area_matrix import SUM, AreaMatrix
+
+NAN = np.nan
+
+
+def _dates(*days):
+    return pd.to_datetime([f'2020-08-{x:02}' for x in days]).to_numpy()
+
+
+def _matrix(**kwargs):
+    # Area a is reported every day, area b skips the 2nd and misses a value.
+    return AreaMatrix.from_arrays(
+        _dates(1, 1, 2, 3, 3, 4, 4),
+        np.array(['a', 'b', 'a', 'a', 'b', 'a', 'b'], dtype=object),
+        {'cases': np.array([1., 10., 3., 6., NAN, 10., 15.])}, **kwargs)
+
+
+def test_pivot():
+    matrix = _matrix()
+    assert list(matrix.areas) == ['a', 'b']
+    np.testing.assert_array_equal(matrix.present, [[1, 1], [1, 0], [1, 1],
+                                                   [1, 1]])
+    np.testing.assert_array_equal(matrix.values['cases'],
+                                  [[1, 10], [3, NAN], [6, NAN], [10, 15]])
+
+
+def test_rows_without_an_area_are_left_out():
+    matrix = AreaMatrix.from_arrays(
+        _dates(1, 1), np.array(['a', None], dtype=object),
+        {'cases': np.array([1., 2.])})
+    assert list(matrix.areas) == ['a']
+    np.testing.assert_array_equal(matrix.values['cases'], [[1]])
+
+
+def test_booleans_are_kept():
+    matrix = AreaMatrix.from_arrays(
+        _dates(1, 2), np.array(['a', 'a'], dtype=object),
+        {'outbreak': np.array([True, False])})
+    assert matrix.values['outbreak'].dtype == object
+    assert list(matrix.values['outbreak'][:, 0]) == [True, False]
+
+
+def test_diff_skips_unreported_dates_and_propagates_nan():
+    matrix = _matrix()
+    np.testing.assert_array_equal(matrix.diff(matrix.values['cases']),
+                                  [[NAN, NAN], [2, NAN], [3, NAN], [4, NAN]])
+
+
+def test_rolling_mean_needs_every_value_of_its_window():
+    matrix = _matrix()
+    cases = matrix.values['cases']
+    np.testing.assert_array_equal(matrix.rolling_mean(cases, 2),
+                                  [[NAN, NAN], [2, NAN], [4.5, NAN], [8, NAN]])
+    # The window of b's last report holds its missing value.
+    np.testing.assert_array_equal(matrix.rolling_mean(cases, 3)[-1],
+                                  [19 / 3, NAN])
+
+
+def test_ffill_fills_chosen_areas_from_their_reports():
+    matrix = _matrix()
+    filled = matrix.ffill(matrix.values['cases'], np.array([False, True]))
+    # b is not filled on the 2nd, which it was not reported on.
+    np.testing.assert_array_equal(filled, [[1, 10], [3, NAN], [6, 10],
+                                           [10, 15]])
+
+
+def test_ffill_missing_fills_the_days_between_reports():
+    # a is reported on the 1st, 4th and 5th, b on the 1st and 4th without a
+    # value on the 4th, and c first on the 4th without a value.
+    matrix = AreaMatrix.from_arrays(
+        _dates(1, 1, 4, 4, 4, 5),
+        np.array(['a', 'b', 'a', 'b', 'c', 'a'], dtype=object),
+        {'cases': np.array([1., 10., 7., NAN, NAN, 9.]),
+         'outbreak': np.array([True, False, False, True, True, True])}
+    ).ffill_missing()
+    assert list(matrix.dates) == list(pd.to_datetime(_dates(1, 2, 3, 4, 5)))
+    np.testing.assert_array_equal(matrix.present, [
+        [1, 1, 0], [1, 1, 0], [1, 1, 0], [1, 1, 1], [1, 0, 0]])
+    cases = matrix.values['cases']
+    np.testing.assert_array_equal(cases, [
+        [1, 10, NAN], [1, 10, NAN], [1, 10, NAN], [7, 10, NAN],
+        [9, NAN, NAN]])
+    assert list(matrix.values['outbreak'][:, 0]) == [True] * 3 + [False, True]
+    assert list(matrix.values['outbreak'][:4, 1]) == [False] * 3 + [True]
+    change = matrix.diff(cases)
+    np.testing.assert_array_equal(change, [
+        [NAN, NAN, NAN], [0, 0, NAN], [0, 0, NAN], [6, 0, NAN],
+        [2, NAN, NAN]])
+    np.testing.assert_array_equal(matrix.rolling_mean(change, 2), [
+        [NAN, NAN, NAN], [NAN, NAN, NAN], [0, 0, NAN], [3, 0, NAN],
+        [4, NAN, NAN]])
+
+
+def test_group_sums_missing_values_as_zero():
+    regions = _matrix().group(np.array(['r', 'r'], dtype=object))
+    np.testing.assert_array_equal(regions.values['cases'],
+                                  [[11], [3], [6], [25]])
+    assert regions.present.all()
+
+
+def test_duplicates_raise():
+    with pytest.raises(ValueError, match='More than one row of a'):
+        AreaMatrix.from_arrays(_dates(1, 1), np.array(['a', 'a']),
+                               {'cases': np.array([1., 2.])})
+
+
+def test_duplicates_sum():
+    matrix = AreaMatrix.from_arrays(
+        _dates(1, 1, 2, 2, 3, 3), np.array(['a'] * 6, dtype=object),
+        {'cases': np.array([1., 2., 3., NAN, NAN, NAN])}, duplicates=SUM)
+    np.testing.assert_array_equal(matrix.values['cases'], [[3], [3], [NAN]])
+    assert matrix.present.all()
+
+
+def test_duplicates_cannot_sum_text():
+    with pytest.raises(ValueError, match='not numeric'):
+        AreaMatrix.from_arrays(_dates(1, 1), np.array(['a', 'a']),
+                               {'note': np.array(['x', 'y'], dtype=object)},
+                               duplicates=SUM)
+
+
+def test_to_long():
+    matrix = _matrix()
+    df = matrix.to_long({'cases': matrix.values['cases']}, 'place')
+    pd.testing.assert_frame_equal(df, pd.DataFrame({
+        const.DATE: pd.to_datetime(_dates(1, 1, 2, 3, 3, 4, 4)),
+        'place': ['a', 'b', 'a', 'a', 'b', 'a', 'b'],
+        'cases': [1., 10., 3., 6., NAN, 10., 15.],
+    }))
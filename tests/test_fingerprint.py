@@ -0,0 +1,38 @@
+import lac_covid19.const as const
+import lac_covid19.daily_pr.fingerprint as fingerprint
+import lac_covid19.geo.areas as area_registry
+from lac_covid19.tests import support
+
+# Reads the lxml parser of access and the lock of the area registry, whose
+# repr() differs in every process.
+SCRIPT = """
+import lac_covid19.daily_pr.fingerprint as fingerprint
+import lac_covid19.geo.areas as area_registry
+print(fingerprint.release_digest('2020-06-01'))
+print(fingerprint.code(area_registry.categorical))
+"""
+
+
+def test_same_in_every_process():
+    first = support.run_python(SCRIPT).split()
+    assert first == support.run_python(SCRIPT).split()
+    assert first == [fingerprint.release_digest('2020-06-01'),
+                     fingerprint.code(area_registry.categorical)]
+
+
+def test_release_differs_by_corrections():
+    # A DATA_TYPOS entry only changes the key it corrects on its date.
+    corrected = fingerprint.release('2020-04-13')
+    plain = fingerprint.release('2020-04-12')
+    changed = [x for x in fingerprint.KEYS if corrected[x] != plain[x]]
+    assert changed == [const.CASES_BY_AGE]
+
+
+def test_opaque_values_are_reduced_to_their_type():
+    class Opaque:
+        pass
+
+    assert (fingerprint._canonical(Opaque(), set())
+            == fingerprint._canonical(Opaque(), set()))
+    assert fingerprint._canonical(('a', 1, None), set()) == [
+        "'a'", '1', 'None']
@@ -0,0 +1,62 @@
+import copy
+
+import pandas as pd
+
+import lac_covid19.const as const
+import lac_covid19.daily_pr.ingest as ingest
+from lac_covid19.tests import support
+
+
+def test_a_table_for_every_section_sorted_by_date_and_group():
+    prs = support.releases(3)
+    tables = ingest.tabulate(reversed(prs))
+    assert set(tables) == set(ingest.SECTIONS)
+    for section, df in tables.items():
+        group = ingest.GROUP_COLUMN[section]
+        sort_by = [const.DATE] + ([group] if group else [])
+        pd.testing.assert_frame_equal(
+            df, df.sort_values(sort_by).reset_index(drop=True))
+    assert list(tables[const.AGGREGATE][const.NEW_CASES]) == [
+        x[const.NEW_CASES] for x in prs]
+    age = tables[const.CASES_BY_AGE]
+    assert len(age) == 3 * len(support.AGE_GROUPS)
+    assert list(age.columns) == [const.DATE, const.AGE_GROUP, const.CASES]
+
+
+def test_only_reported_values_have_rows():
+    prs = support.releases(2)
+    del prs[1][const.CASES_BY_AGE][const.AGE_0_4]
+    prs[1][const.AREA] = prs[1][const.AREA][:1]
+    tables = ingest.tabulate(prs)
+    age = tables[const.CASES_BY_AGE]
+    assert len(age) == 2 * len(support.AGE_GROUPS) - 1
+    assert len(tables[const.AREA]) == len(support.AREAS) + 1
+
+
+def test_health_departments_reported_with_cases_or_deaths():
+    pr = support.release(0)
+    del pr[const.DEATHS][const.hd.PASADENA]
+    del pr[const.CASES][const.hd.LONG_BEACH]
+    df = ingest.tabulate([pr])[const.HEALTH_DPET].set_index(
+        const.HEALTH_DPET)
+    assert set(df.index) == set(support.HEALTH_DEPTS)
+    assert pd.isna(df.loc[const.hd.PASADENA, const.DEATHS])
+    assert pd.isna(df.loc[const.hd.LONG_BEACH, const.CASES])
+    assert df.loc[const.hd.LONG_BEACH, const.DEATHS] == (
+        pr[const.DEATHS][const.hd.LONG_BEACH])
+
+
+def test_releases_are_left_untouched():
+    prs = support.releases(2)
+    before = copy.deepcopy(prs)
+    ingest.tabulate(prs)
+    assert prs == before
+
+
+def test_tables_are_passed_through():
+    tables = ingest.tabulate(support.releases(2))
+    assert ingest.is_tables(tables)
+    assert ingest.tables(tables) is tables
+    assert not ingest.is_tables(support.releases(2))
+    for section, df in ingest.tables(iter(support.releases(2))).items():
+        pd.testing.assert_frame_equal(df, tables[section])
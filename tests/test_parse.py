@@ -0,0 +1,122 @@
+import datetime as dt
+import time
+
+import lac_covid19.const as const
+import lac_covid19.daily_pr.parse as parse
+
+# The text of a press release as access.load_html() extracts it, in the form
+#   published from October 2020.
+RELEASE = '''For Immediate Release:
+October 24, 2020
+Public Health Reports 18 New Deaths and 1,266 New Positive Cases of COVID-19 in Los Angeles County
+Public Health has identified 18 new deaths and 1,266 new cases of COVID-19.
+Laboratory Confirmed Cases -- 298,643 Total Cases Los Angeles County (excl. LB and Pas) -- 284,349 Long Beach -- 11,826 Pasadena -- 2,468
+Deaths 6,978 Los Angeles County (excl. LB and Pas) 6,629 Long Beach 220 Pasadena 129
+Age Group (Los Angeles County Cases Only-excl LB and Pas) - 0 to 4 5877  - 5 to 11 15076  - 12 to 17 17837  - 18 to 29 67856  - 30 to 49 93045  - 50 to 64 55062  - 65 to 79 21036  - over 80 8097 - Under Investigation 463
+Hospitalization Hospitalized (Ever) 19035
+Gender (Los Angeles County Cases Only-excl. LB and Pas) - Female 144436  - Male 137551  - Other 115 - Under Investigation 2247
+Race/Ethnicity (Los Angeles County Cases Only-excl. LB and Pas) - American Indian/Alaska Native 481  - Asian 12883  - Black 9903  - Hispanic/Latino 138290  - Native Hawaiian/Pacific Islander 1107  - White 29035  - Other 32010 - Under Investigation 60640
+Deaths Race/Ethnicity (Los Angeles County Cases Only-excl. LB and Pas) - American Indian/Alaska Native 15  - Asian 1013  - Black 646  - Hispanic/Latino 3512  - Native Hawaiian/Pacific Islander 27  - White 1291  - Other 58 - Under Investigation 67
+CITY / COMMUNITY** Cases Case Rate City of Agoura Hills 195 ( 937 ) City of Alhambra 1484 ( 1701 ) City of Avalon -- ( -- ) City of Burbank 2181 ( 2031 ) Los Angeles - Boyle Heights 6051 ( 6476 ) Los Angeles - Wholesale District* 3218 ( 10665 ) Unincorporated - Castaic* 3102 ( 14121 ) Unincorporated - Val Verde 90 ( 3591 ) Under Investigation 3143
+'''
+
+
+def test_parse_release():
+    pr = parse.parse_pr(RELEASE)
+    assert pr[const.DATE] == dt.date(2020, 10, 24)
+    assert (pr[const.NEW_CASES], pr[const.NEW_DEATHS]) == (1266, 18)
+    assert pr[const.HOSPITALIZATIONS] == 19035
+    assert pr[const.CASES] == {const.hd.LOS_ANGELES_COUNTY: 284349,
+                               const.hd.LONG_BEACH: 11826,
+                               const.hd.PASADENA: 2468}
+    assert pr[const.DEATHS] == {const.hd.LOS_ANGELES_COUNTY: 6629,
+                                const.hd.LONG_BEACH: 220,
+                                const.hd.PASADENA: 129}
+    assert pr[const.CASES_BY_AGE] == {
+        const.AGE_0_4: 5877, const.AGE_5_11: 15076, const.AGE_12_17: 17837,
+        const.AGE_18_29: 67856, const.AGE_30_49: 93045,
+        const.AGE_50_64: 55062, const.AGE_65_79: 21036,
+        const.AGE_OVER_80: 8097}
+    assert pr[const.CASES_BY_GENDER] == {const.FEMALE: 144436,
+                                         const.MALE: 137551, const.OTHER: 115}
+    assert pr[const.CASES_BY_RACE][const.RACE_HL] == 138290
+    assert len(pr[const.CASES_BY_RACE]) == len(const.RACE_GROUP)
+    assert pr[const.DEATHS_BY_RACE][const.RACE_AI_AN] == 15
+    assert pr[const.DEATHS_BY_RACE][const.OTHER] == 58
+    assert pr[const.AREA] == [
+        ('City of Agoura Hills', 195, 937, False),
+        ('City of Alhambra', 1484, 1701, False),
+        ('City of Avalon', None, None, False),
+        ('City of Burbank', 2181, 2031, False),
+        ('Los Angeles - Boyle Heights', 6051, 6476, False),
+        ('Los Angeles - Wholesale District', 3218, 10665, True),
+        ('Unincorporated - Castaic', 3102, 14121, True),
+        ('Unincorporated - Val Verde', 90, 3591, False),
+    ]
+
+
+def test_parse_only_some_keys():
+    pr = parse.parse_pr(RELEASE, keys=[const.HOSPITALIZATIONS])
+    assert pr == {const.DATE: dt.date(2020, 10, 24),
+                  const.HOSPITALIZATIONS: 19035}
+
+
+def test_automated_new_cases_and_deaths():
+    pr_txt = RELEASE.replace(
+        'Public Health has identified 18 new deaths and 1,266 new cases of '
+        'COVID-19.', 'Daily new cases: 1,266* Daily new deaths: 18')
+    assert parse._get_new_cases_deaths(pr_txt) == (1266, 18)
+
+
+def test_new_deaths_in_words():
+    pr_txt = RELEASE.replace('identified 18 new deaths',
+                             'identified seven new deaths')
+    assert parse._get_new_cases_deaths(pr_txt) == (1266, 7)
+
+
+def test_first_health_departments_after_los_angeles_county():
+    pr_txt = RELEASE.replace('Pasadena -- 2,468',
+                             'Pasadena -- 2,468 Long Beach -- 1')
+    assert parse._parse_hd_cases_deaths(pr_txt)[const.CASES] == {
+        const.hd.LOS_ANGELES_COUNTY: 284349, const.hd.LONG_BEACH: 11826,
+        const.hd.PASADENA: 2468}
+
+
+def test_under_investigation_across_lines():
+    pr_txt = RELEASE.replace('Other 115 - Under Investigation',
+                             'Other 115 - Under\n Investigation')
+    assert parse._parse_gender(pr_txt) == {
+        const.FEMALE: 144436, const.MALE: 137551, const.OTHER: 115}
+
+
+def test_group_without_a_count():
+    pr_txt = RELEASE.replace('- Other 115', '- Other --')
+    assert parse._parse_gender(pr_txt) == {const.FEMALE: 144436,
+                                           const.MALE: 137551}
+
+
+def test_listing_without_under_investigation():
+    pr_txt = RELEASE.replace('Other 115 - Under Investigation 2247', '')
+    assert parse._parse_gender(pr_txt) == {}
+
+
+def test_no_outbreaks_before_they_were_recorded():
+    pr_txt = RELEASE.replace('October 24, 2020', 'May 13, 2020')
+    assert {x[3] for x in parse._parse_csa(pr_txt)} == {None}
+
+
+def test_malformed_release_parses_in_linear_time():
+    # Names without the numbers after them, on a single long line.
+    line = ('Los Angeles County (excl. LB and Pas) -- Long Beach -- '
+            'Gender (Los Angeles County Cases Only) - Female - Male '
+            'City of Agoura Hills ( Hospitalized (Ever) ')
+    pr_txt = 'For Immediate Release: October 24, 2020\n' + line * 5_000
+    start = time.perf_counter()
+    for name in ('_parse_hospitalizations', '_parse_hd_cases_deaths'):
+        try:
+            getattr(parse, name)(pr_txt)
+        except (AttributeError, ValueError):
+            pass
+    assert parse._parse_gender(pr_txt) == {}
+    parse._parse_csa(pr_txt)
+    assert time.perf_counter() - start < 2
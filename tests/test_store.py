@@ -0,0 +1,94 @@
+import os
+
+import pandas as pd
+import pytest
+
+import lac_covid19.const as const
+import lac_covid19.daily_pr.fingerprint as fingerprint
+import lac_covid19.daily_pr.ingest as ingest
+import lac_covid19.daily_pr.store as store
+from lac_covid19.tests import support
+
+
+@pytest.fixture(autouse=True)
+def tmp_store(tmp_path, monkeypatch):
+    support.redirect(str(tmp_path), monkeypatch.setattr)
+
+
+def _assert_tables_equal(tables, expected):
+    assert set(tables) == set(expected)
+    for section, df in tables.items():
+        pd.testing.assert_frame_equal(df, expected[section],
+                                      check_dtype=False)
+
+
+def test_write_only_adds_new_releases():
+    assert store.write(support.releases(3)) == 3
+    assert store.write(support.releases(5)) == 2
+    assert store.write(support.releases(5)) == 0
+    assert list(store.stored_dates().date) == [
+        x[const.DATE] for x in support.releases(5)]
+    _assert_tables_equal(store.load(),
+                         ingest.tabulate(support.releases(5)))
+
+
+def test_load_sections_columns_and_start():
+    store.write(support.releases(4))
+    start = pd.Timestamp(support.release(2)[const.DATE])
+    tables = store.load([const.AREA], {const.AREA: [const.DATE, const.CASES]},
+                        start)
+    assert list(tables) == [const.AREA]
+    expected = ingest.tabulate(support.releases(2, 2))[const.AREA]
+    pd.testing.assert_frame_equal(tables[const.AREA],
+                                  expected[[const.DATE, const.CASES]],
+                                  check_dtype=False)
+
+
+def test_outdated_release_only_rewrites_its_part(monkeypatch):
+    for day in range(3):
+        store.write([support.release(day)])
+    assert store.is_current()
+    outdated = support.release(1)[const.DATE].isoformat()
+    aggregate_dir = store._section_dir(const.AGGREGATE)
+    parts = {x: os.stat(os.path.join(aggregate_dir, x)).st_mtime_ns
+             for x in os.listdir(aggregate_dir)}
+    release_digest = fingerprint.release_digest
+    monkeypatch.setattr(
+        fingerprint, 'release_digest',
+        lambda date: 'outdated' if date == outdated else release_digest(date)
+    )
+    assert not store.is_current()
+    # Only the outdated release is written again.
+    assert store.write(support.releases(3)) == 1
+    assert store.is_current()
+    for x, mtime in parts.items():
+        if outdated not in x:
+            assert os.stat(os.path.join(aggregate_dir, x)).st_mtime_ns == mtime
+    _assert_tables_equal(store.load(),
+                         ingest.tabulate(support.releases(3)))
+
+
+def test_outdated_releases_are_removed_from_a_larger_part(monkeypatch):
+    store.write(support.releases(3))
+    # The releases written again span the same dates as the rewritten part.
+    outdated = {support.release(x)[const.DATE].isoformat() for x in (0, 2)}
+    release_digest = fingerprint.release_digest
+    monkeypatch.setattr(
+        fingerprint, 'release_digest',
+        lambda date: 'outdated' if date in outdated else release_digest(date)
+    )
+    assert store.write(support.releases(3)) == 2
+    assert len(os.listdir(store._section_dir(const.AGGREGATE))) == 2
+    _assert_tables_equal(store.load(),
+                         ingest.tabulate(support.releases(3)))
+
+
+def test_compact_keeps_the_tables():
+    for day in range(3):
+        store.write([support.release(day)])
+    before = store.load()
+    store.compact()
+    for section in ingest.SECTIONS:
+        parts = os.listdir(store._section_dir(section))
+        assert len([x for x in parts if not x.startswith('.')]) == 1
+    _assert_tables_equal(store.load(), before)
@@ -0,0 +1,239 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip('covid_tools')
+
+import lac_covid19.const as const
+from lac_covid19.tests import support
+
+support.offline()
+
+import lac_covid19.daily_pr.ingest as ingest
+import lac_covid19.daily_pr.time_series as time_series
+import lac_covid19.geo.areas as area_registry
+
+DAYS = 60  # Areas are kept once reported on more than 50 of 60 days
+
+
+@pytest.fixture(autouse=True)
+def tmp_cache(tmp_path, monkeypatch):
+    support.redirect(str(tmp_path), monkeypatch.setattr)
+
+
+def _with_long_beach_area(pr):
+    n = (pr[const.DATE] - support.START).days + 1
+    pr[const.AREA].append((const.hd.CSA_LB, 7 * n, 7 * n / 4.67, False))
+    return pr
+
+
+def test_area_reported_as_a_health_department_keeps_both_rows():
+    prs = [_with_long_beach_area(x) for x in support.releases(DAYS)]
+    df = time_series.create_by_area(prs)
+    long_beach = df[df[const.AREA] == const.hd.CSA_LB]
+    assert (long_beach.groupby(const.DATE).size() == 2).all()
+    # The area's row comes before the health department's, and each row's
+    # changes are taken over its own reports.
+    sources = long_beach.groupby(const.DATE).cumcount().to_numpy()
+    np.testing.assert_array_equal(
+        long_beach.loc[sources == 0, const.CASES].astype(float).to_numpy(),
+        7 * np.arange(1, DAYS + 1))
+    for _, group in long_beach.groupby(sources):
+        new_cases = group[const.NEW_CASES].astype(float).to_numpy()
+        expected = group[const.CASES].astype(float).diff().to_numpy()
+        np.testing.assert_array_equal(new_cases, expected)
+
+    # Regions count the area once for each row, as summing always has.
+    region = area_registry.region([const.hd.CSA_LB])[0]
+    df_region = time_series.create_by_region(df)
+    cases = df_region.loc[df_region[const.REGION] == region, const.CASES]
+    expected = long_beach.groupby(const.DATE)[const.CASES].sum()
+    np.testing.assert_array_equal(cases.astype(float).to_numpy(),
+                                  expected.astype(float).to_numpy())
+
+
+# Days without a press release
+NO_RELEASE = pd.to_datetime(['2020-07-03', '2020-07-04', '2020-07-05',
+                             '2020-12-25'])
+
+
+# An area of each region
+REGION_AREAS = {
+    const.SPA_AV: 'City of Lancaster',
+    const.SPA_SF: 'City of Agoura Hills',
+    const.SPA_SG: 'City of Alhambra',
+    const.SPA_M: 'Los Angeles - Angelino Heights',
+    const.SPA_W: 'City of Beverly Hills',
+    const.SPA_S: 'City of Compton',
+    const.SPA_E: 'City of Artesia',
+    const.SPA_SB: 'City of Avalon',
+}
+
+
+def test_regions_match_the_published_table():
+    published = support.published('region', '2020-11-20', '2020-12-31')
+    # There was no press release on Christmas, so no area has a row on it.
+    reported = published[~published[const.DATE].isin(NO_RELEASE)]
+    df_area = pd.DataFrame({
+        const.DATE: reported[const.DATE],
+        const.AREA: reported[const.REGION].map(REGION_AREAS),
+        const.CASES: reported[const.CASES],
+    })
+    df = time_series.create_by_region(df_area)
+    # The averages of the first 14 days are taken over days before them.
+    compare = '2020-12-04'
+    pd.testing.assert_frame_equal(
+        df[df[const.DATE] >= compare].reset_index(drop=True),
+        published[published[const.DATE] >= compare].reset_index(drop=True),
+        check_dtype=False)
+
+
+@pytest.mark.parametrize('name, builder, start, end', [
+    # Across the change of age groups and the days without a release in July
+    ('age', time_series.create_by_age, '2020-06-15', '2020-08-31'),
+    ('gender', time_series.create_by_gender, '2020-12-01', '2020-12-31'),
+    ('race-ethnicity', time_series.create_by_race, '2020-12-01',
+     '2020-12-31'),
+])
+def test_groups_match_the_published_tables(name, builder, start, end):
+    published = support.published(name, start, end)
+    reported = published[~published[const.DATE].isin(NO_RELEASE)]
+    tables = {}
+    for section, (group, variable) in ingest.GROUP_SECTIONS.items():
+        if group in published and variable in published:
+            tables[section] = reported[[const.DATE, group, variable]]
+    df = builder(tables)
+    compare = pd.Timestamp(start) + pd.Timedelta(14, 'days')
+    pd.testing.assert_frame_equal(
+        df[df[const.DATE] >= compare].reset_index(drop=True),
+        published[published[const.DATE] >= compare].reset_index(drop=True),
+        check_dtype=False)
+
+
+def test_areas_fill_days_without_a_release():
+    prs = support.releases(DAYS)
+    del prs[40]
+    df = time_series.create_by_area(prs)
+    missing = pd.Timestamp(support.START) + pd.Timedelta(40, 'days')
+    area = df[df[const.AREA] == 'City of Burbank'].set_index(const.DATE)
+    assert len(area) == DAYS
+    before = missing - pd.Timedelta(1, 'days')
+    assert area.loc[missing, const.CASES] == area.loc[before, const.CASES]
+    assert area.loc[missing, const.NEW_CASES] == 0
+    cases = area[const.CASES].astype(float)
+    np.testing.assert_allclose(
+        area[const.NEW_CASES_14_DAY_AVG].astype(float).to_numpy()[14:],
+        cases.diff().rolling(14).mean().round(2).to_numpy()[14:])
+
+
+def test_custom_regions_match_each_region_alone():
+    prs = support.releases(DAYS)
+    del prs[40]
+    missing = pd.Timestamp(support.START) + pd.Timedelta(40, 'days')
+    df_area = time_series.create_by_area(prs)
+    # The areas fill the day, so the regions are left to fill it.
+    df_area = df_area[df_area[const.DATE] != missing]
+    regions = {
+        'Verdugos': ['City of Burbank', 'City of Glendale'],
+        'Burbank and west': ['City of Burbank', 'City of Santa Monica',
+                             'Los Angeles - Boyle Heights'],
+    }
+    df = time_series.create_custom_regions(df_area, regions)
+    for name, areas in regions.items():
+        region = df[df[const.REGION] == name].drop(columns=const.REGION)
+        expected = time_series.create_custom_region(df_area, areas)
+        pd.testing.assert_frame_equal(region.reset_index(drop=True),
+                                      expected.reset_index(drop=True),
+                                      check_dtype=False)
+        assert missing in set(region[const.DATE])
+
+
+# Builds in another process from the store and cache under a directory,
+# counting the full loads of the store and the tables built.
+SCRIPT = '''
+import json
+import lac_covid19.const as const
+from lac_covid19.tests import support
+support.offline()
+import lac_covid19.daily_pr.store as store
+import lac_covid19.daily_pr.time_series as time_series
+support.redirect({root!r})
+calls = {{'full loads': 0, 'tail loads': 0, 'builds': 0}}
+load, build_table = store.load, time_series._build_table
+def counted_load(*args, start=None, **kwargs):
+    calls['tail loads' if start else 'full loads'] += 1
+    return load(*args, start=start, **kwargs)
+def counted_build(*args, **kwargs):
+    calls['builds'] += 1
+    return build_table(*args, **kwargs)
+store.load, time_series._build_table = counted_load, counted_build
+{body}
+print(json.dumps(calls))
+'''
+
+
+def _run(root, body):
+    return json.loads(support.run_python(
+        SCRIPT.format(root=str(root), body=body)).splitlines()[-1])
+
+
+def test_second_process_appends_a_new_release(tmp_path):
+    days = time_series.TAIL_DAYS + time_series.OVERLAP_DAYS + 10
+    update = ('store.write(support.releases({}))\n'
+              'time_series.generate_all_ts(incremental=True)')
+    first = _run(tmp_path, update.format(days))
+    assert first['full loads'] == 1
+    calls = _run(tmp_path, update.format(days + 1))
+    assert calls['full loads'] == 0 and calls['tail loads'] == 1
+
+    # The appended tables are the same as tables built in full.
+    tables = ingest.tabulate(support.releases(days + 1))
+    built = time_series._build_tables(time_series.TABLE_SOURCES, tables, {})
+    for table, df in built.items():
+        cached = time_series._load_table_cache(table)
+        assert cached['dates'] == time_series.release_dates(tables)
+        assert time_series._same_rows(time_series._read_table_cache(table),
+                                      df)
+
+
+def _cache(root, days=DAYS):
+    _run(root, f'store.write(support.releases({days}))\n'
+               'time_series.generate_all_ts(incremental=True)')
+
+
+def test_cached_table_loads_in_another_process(tmp_path):
+    _cache(tmp_path)
+    calls = _run(tmp_path, 'all_ts = time_series.generate_all_ts()\n'
+                           'all_ts[const.REGION]\n'
+                           'all_ts[const.GENDER]')
+    # The region table and the area table it is built from are both read
+    # from the cache.
+    assert calls == {'full loads': 0, 'tail loads': 0, 'builds': 0}
+
+
+def test_changed_cache_is_built_in_another_process(tmp_path):
+    _cache(tmp_path)
+    path = tmp_path / 'time-series-cache' / 'gender.feather'
+    path.write_bytes(path.read_bytes() + b'\0')
+    calls = _run(tmp_path, 'time_series.generate_all_ts()[const.GENDER]')
+    # Its file no longer matches the manifest, so it is built from the store.
+    assert calls == {'full loads': 1, 'tail loads': 0, 'builds': 1}
+
+
+def test_read_columns_from_the_cache_in_another_process(tmp_path):
+    _cache(tmp_path)
+    calls = _run(tmp_path, '''
+reads, read_cache = [], time_series._read_table_cache
+def recorded_read(table, columns=None):
+    reads.append([table, columns])
+    return read_cache(table, columns)
+time_series._read_table_cache = recorded_read
+df = time_series.generate_all_ts().read(const.AREA, [const.DATE, const.CASES])
+calls.update(reads=reads, columns=list(df.columns))''')
+    assert calls == {
+        'full loads': 0, 'tail loads': 0, 'builds': 0,
+        'reads': [[const.AREA, [const.DATE, const.CASES]]],
+        'columns': [const.DATE, const.CASES],
+    }
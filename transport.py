@@ -0,0 +1,100 @@
+"""Shared HTTP transport for every download from the Los Angeles County
+    Department of Public Health websites. Requests reuse pooled keep-alive
+    connections, time out instead of hanging, and are retried with
+    exponential backoff and jitter on transient failures.
+"""
+
+import random
+import statistics
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import requests
+import requests.adapters
+
+TIMEOUT = (5, 30)  # Seconds to connect, seconds to read
+RETRIES = 4
+BACKOFF = 0.5
+POOL_SIZE = 16
+RETRY_STATUS = frozenset((429, 500, 502, 503, 504))
+
+_session = None
+_session_lock = threading.Lock()
+
+LATENCIES: List[Tuple[str, Optional[int], float]] = []
+_latencies_lock = threading.Lock()
+
+
+def session(pool_size: int = POOL_SIZE) -> requests.Session:
+    """The process wide session holding the keep-alive connection pool."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            adapter = requests.adapters.HTTPAdapter(
+                pool_connections=pool_size, pool_maxsize=pool_size
+            )
+            _session = requests.Session()
+            _session.mount('http://', adapter)
+            _session.mount('https://', adapter)
+        return _session
+
+
+def _record(url: str, status: Optional[int], seconds: float) -> None:
+    with _latencies_lock:
+        LATENCIES.append((url, status, seconds))
+
+
+def get(url: str, headers: Optional[Dict[str, str]] = None,
+        timeout: Optional[Tuple[float, float]] = None,
+        retries: Optional[int] = None,
+        backoff: Optional[float] = None) -> requests.Response:
+    """Requests a page, retrying connection errors, timeouts and server errors.
+    Args:
+        url: The address to request.
+        headers: Extra request headers.
+        timeout: The connect and read timeouts in seconds. Defaults to the
+            module level TIMEOUT, as do retries and backoff.
+        retries: How many times a failed request is attempted again.
+        backoff: The base delay in seconds. Attempt n waits a random amount
+            of time up to backoff * 2^n.
+    Returns:
+        The final response. Status codes outside RETRY_STATUS are returned as
+        is for the caller to handle.
+    """
+    timeout = TIMEOUT if timeout is None else timeout
+    retries = RETRIES if retries is None else retries
+    backoff = BACKOFF if backoff is None else backoff
+    for attempt in range(retries + 1):
+        start = time.perf_counter()
+        try:
+            r = session().get(url, headers=headers, timeout=timeout)
+        except (requests.exceptions.ConnectionError,
+                requests.exceptions.Timeout):
+            _record(url, None, time.perf_counter() - start)
+            if attempt == retries:
+                raise
+        else:
+            _record(url, r.status_code, time.perf_counter() - start)
+            if r.status_code not in RETRY_STATUS or attempt == retries:
+                return r
+        time.sleep(random.uniform(0, backoff * 2 ** attempt))
+
+
+def latency_report(reset: bool = False) -> str:
+    """Summarizes the latency of every request made so far."""
+    with _latencies_lock:
+        seconds = sorted(x[2] for x in LATENCIES)
+        failures = sum(1 for x in LATENCIES
+                       if x[1] is None or x[1] in RETRY_STATUS)
+        if reset:
+            LATENCIES.clear()
+    if not seconds:
+        return '0 requests'
+    return (
+        f'{len(seconds)} requests ({failures} failed) - '
+        f'mean {statistics.mean(seconds):.3f}s, '
+        f'median {statistics.median(seconds):.3f}s, '
+        f'p95 {seconds[int(0.95 * (len(seconds) - 1))]:.3f}s, '
+        f'max {seconds[-1]:.3f}s'
+    )